@@ -0,0 +1,295 @@
+import crypto from 'crypto'
+import fs from 'fs'
+import path from 'path'
+
+// Content-addressed memo of personality analyses, keyed by a hash of the
+// normalized tweet set; overlapping tweet sets reuse the closest prior result
+// through a MinHash signature. Analyses only run in this route, so this module
+// is the whole memo: index.json holds signatures and stats, <digest>.json the
+// results. Every read-modify-write of index.json happens under index.lock,
+// so concurrent server processes don't drop each other's entries or stats.
+
+const MEMO_DIR = process.env.ANALYSIS_MEMO_DIR || path.join(process.cwd(), 'analysis_memo')
+const INDEX_FILE = path.join(MEMO_DIR, 'index.json')
+const LOCK_FILE = path.join(MEMO_DIR, 'index.lock')
+const LOCK_WAIT_MS = 2000
+// A lock older than this was left behind by a crashed process
+const LOCK_STALE_MS = 10000
+const FORMAT_VERSION = 1
+const MAX_ENTRIES = parseInt(process.env.ANALYSIS_MEMO_MAX_ENTRIES || '500')
+const TTL_SECONDS = parseInt(process.env.ANALYSIS_MEMO_TTL || String(30 * 24 * 60 * 60))
+const NEAR_THRESHOLD = parseFloat(process.env.ANALYSIS_MEMO_THRESHOLD || '0.85')
+const NUM_PERM = 64
+
+interface MemoEntry {
+  namespace: string
+  signature: number[]
+  tweets: number
+  created_at: number
+  last_used: number
+  hits: number
+}
+
+interface MemoIndex {
+  format: number
+  entries: Record<string, MemoEntry>
+  stats: Record<string, number>
+}
+
+export interface MemoStats {
+  exact: number
+  near: number
+  miss: number
+  lookups: number
+  hitRate: number
+}
+
+export interface MemoMatch {
+  type: 'exact' | 'near'
+  digest: string
+  overlap: number
+}
+
+function normalizeText(text: string): string {
+  return (text || '')
+    .normalize('NFKC')
+    .replace(/https?:\/\/\S+/gi, ' ')
+    .replace(/\s+/g, ' ')
+    .trim()
+    .toLowerCase()
+}
+
+// Code point order, matching Python's sorted() for tweets with emoji
+function compareCodePoints(a: string, b: string): number {
+  const left = Array.from(a)
+  const right = Array.from(b)
+  for (let i = 0; i < Math.min(left.length, right.length); i++) {
+    const diff = left[i].codePointAt(0)! - right[i].codePointAt(0)!
+    if (diff !== 0) {
+      return diff
+    }
+  }
+  return left.length - right.length
+}
+
+function corpusItems(tweets: any[]): string[] {
+  const items = new Set(tweets.map(tweet => normalizeText(tweet.text)))
+  items.delete('')
+  return Array.from(items).sort(compareCodePoints)
+}
+
+function corpusDigest(items: string[], namespace: string): string {
+  return crypto.createHash('sha256').update(namespace + '\x00' + items.join('\n'), 'utf8').digest('hex')
+}
+
+function minhashSignature(items: string[]): number[] {
+  const signature = new Array(NUM_PERM).fill(0xFFFFFFFF)
+  for (const item of items) {
+    for (let i = 0; i < NUM_PERM; i++) {
+      const value = parseInt(crypto.createHash('md5').update(`${i}:${item}`, 'utf8').digest('hex').substring(0, 8), 16)
+      if (value < signature[i]) {
+        signature[i] = value
+      }
+    }
+  }
+  return signature
+}
+
+function estimateOverlap(a: number[], b: number[]): number {
+  if (!a.length || a.length !== b.length) {
+    return 0
+  }
+  return a.filter((value, i) => value === b[i]).length / a.length
+}
+
+function loadIndex(): MemoIndex {
+  try {
+    if (fs.existsSync(INDEX_FILE)) {
+      const index = JSON.parse(fs.readFileSync(INDEX_FILE, 'utf8'))
+      if (index.format === FORMAT_VERSION) {
+        return index
+      }
+    }
+  } catch (error) {
+    console.error('Analysis memo index read error:', error)
+  }
+  return { format: FORMAT_VERSION, entries: {}, stats: { exact: 0, near: 0, miss: 0 } }
+}
+
+function writeJson(file: string, data: any): void {
+  fs.mkdirSync(MEMO_DIR, { recursive: true })
+  const tmpFile = `${file}.${process.pid}.tmp`
+  fs.writeFileSync(tmpFile, JSON.stringify(data))
+  fs.renameSync(tmpFile, file)
+}
+
+function resultFile(digest: string): string {
+  return path.join(MEMO_DIR, `${digest}.json`)
+}
+
+function sleep(ms: number): Promise<void> {
+  return new Promise(resolve => setTimeout(resolve, ms))
+}
+
+// Apply update to the current index.json and write it back while holding
+// index.lock; skipped (returns false) if the lock can't be taken in time
+async function updateIndex(update: (index: MemoIndex) => void): Promise<boolean> {
+  fs.mkdirSync(MEMO_DIR, { recursive: true })
+  const started = Date.now()
+  let fd: number | null = null
+  while (fd === null) {
+    try {
+      fd = fs.openSync(LOCK_FILE, 'wx')
+    } catch (error: any) {
+      if (error.code !== 'EEXIST') {
+        throw error
+      }
+      try {
+        if (Date.now() - fs.statSync(LOCK_FILE).mtimeMs > LOCK_STALE_MS) {
+          fs.unlinkSync(LOCK_FILE)
+          continue
+        }
+      } catch (statError) {
+        // Released between our open and stat
+        continue
+      }
+      if (Date.now() - started > LOCK_WAIT_MS) {
+        console.error('Analysis memo index is locked, skipping index update')
+        return false
+      }
+      await sleep(10 + Math.random() * 20)
+    }
+  }
+
+  try {
+    const index = loadIndex()
+    update(index)
+    writeJson(INDEX_FILE, index)
+    return true
+  } finally {
+    fs.closeSync(fd)
+    fs.unlinkSync(LOCK_FILE)
+  }
+}
+
+function findMatch(index: MemoIndex, items: string[], digest: string, namespace: string, now: number): MemoMatch | null {
+  const entry = index.entries[digest]
+  if (entry && now - entry.created_at < TTL_SECONDS) {
+    return { type: 'exact', digest, overlap: 1 }
+  }
+  if (items.length === 0) {
+    return null
+  }
+  let match: MemoMatch | null = null
+  const signature = minhashSignature(items)
+  for (const otherDigest of Object.keys(index.entries)) {
+    const other = index.entries[otherDigest]
+    if (other.namespace !== namespace || now - other.created_at >= TTL_SECONDS) {
+      continue
+    }
+    const overlap = estimateOverlap(signature, other.signature)
+    if (overlap >= NEAR_THRESHOLD && (!match || overlap > match.overlap)) {
+      match = { type: 'near', digest: otherDigest, overlap: Math.round(overlap * 10000) / 10000 }
+    }
+  }
+  return match
+}
+
+function summarizeStats(stats: Record<string, number>): MemoStats {
+  const exact = stats.exact || 0
+  const near = stats.near || 0
+  const miss = stats.miss || 0
+  const lookups = exact + near + miss
+  return { exact, near, miss, lookups, hitRate: lookups ? (exact + near) / lookups : 0 }
+}
+
+// Lookup counts across every process sharing the memo, and the share served from it
+export function memoStats(): MemoStats {
+  return summarizeStats(loadIndex().stats)
+}
+
+// Prior analysis of the same (or a heavily overlapping) tweet set, or null
+export async function lookupAnalysis(tweets: any[], namespace: string): Promise<{ result: any, match: MemoMatch } | null> {
+  try {
+    const items = corpusItems(tweets)
+    const digest = corpusDigest(items, namespace)
+    const now = Date.now() / 1000
+
+    // Matching only reads the index; the lock is held just for the bookkeeping
+    let match = findMatch(loadIndex(), items, digest, namespace, now)
+    let orphan: string | null = null
+    let result = null
+    if (match) {
+      try {
+        result = JSON.parse(fs.readFileSync(resultFile(match.digest), 'utf8'))
+      } catch (error) {
+        // Index entry outlived its result file
+        orphan = match.digest
+        match = null
+      }
+    }
+
+    const outcome = match ? match.type : 'miss'
+    const counted: { stats?: MemoStats } = {}
+    await updateIndex(index => {
+      const entry = match ? index.entries[match.digest] : undefined
+      if (entry) {
+        entry.last_used = now
+        entry.hits = (entry.hits || 0) + 1
+      }
+      if (orphan) {
+        delete index.entries[orphan]
+      }
+      index.stats[outcome] = (index.stats[outcome] || 0) + 1
+      counted.stats = summarizeStats(index.stats)
+    })
+
+    const stats = counted.stats
+    const hitRate = stats ? ` - hit rate ${Math.round(stats.hitRate * 100)}% of ${stats.lookups} lookups` : ''
+    if (match) {
+      console.log(`🧠 Analysis memo ${match.type} hit (${Math.round(match.overlap * 100)}% overlap)${hitRate}`)
+      return { result, match }
+    }
+    console.log(`🧠 Analysis memo miss${hitRate}`)
+  } catch (error) {
+    console.error('Analysis memo lookup error:', error)
+  }
+  return null
+}
+
+// Remember an analysis for this tweet set, evicting expired and least recently used entries
+export async function storeAnalysis(tweets: any[], result: any, namespace: string): Promise<void> {
+  try {
+    const items = corpusItems(tweets)
+    const digest = corpusDigest(items, namespace)
+    const now = Date.now() / 1000
+    const signature = minhashSignature(items)
+    writeJson(resultFile(digest), result)
+
+    await updateIndex(index => {
+      index.entries[digest] = {
+        namespace,
+        signature,
+        tweets: items.length,
+        created_at: now,
+        last_used: now,
+        hits: 0
+      }
+
+      const expired = Object.keys(index.entries).filter(d => now - index.entries[d].created_at >= TTL_SECONDS)
+      const expiredSet = new Set(expired)
+      const live = Object.keys(index.entries)
+        .filter(d => !expiredSet.has(d))
+        .sort((a, b) => index.entries[a].last_used - index.entries[b].last_used)
+      const doomed = expired.concat(live.slice(0, Math.max(0, live.length - MAX_ENTRIES)))
+      for (const d of doomed) {
+        delete index.entries[d]
+        if (fs.existsSync(resultFile(d))) {
+          fs.unlinkSync(resultFile(d))
+        }
+      }
+    })
+  } catch (error) {
+    console.error('Analysis memo write error:', error)
+  }
+}
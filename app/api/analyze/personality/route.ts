@@ -2,6 +2,11 @@ import { NextRequest, NextResponse } from 'next/server'
 
 export const dynamic = 'force-dynamic'
 import { GoogleGenerativeAI } from '@google/generative-ai'
+import { lookupAnalysis, memoStats, storeAnalysis } from './analysis-memo'
+
+const GEMINI_MODEL = 'gemini-1.5-flash'
+// Includes the model, and bump the version when the prompt changes, so old analyses are not reused
+const MEMO_NAMESPACE = `${GEMINI_MODEL}:personality-v1`
 
 interface AIResponse {
   content: string
@@ -77,7 +82,7 @@ Make it feel like insider knowledge about how this person's mind works and commu
       console.log('📝 Sending prompt to Gemini (length:', prompt.length, 'chars)')
       
       const genAI = new GoogleGenerativeAI(API_KEY)
-      const model = genAI.getGenerativeModel({ model: 'gemini-1.5-flash' })
+      const model = genAI.getGenerativeModel({ model: GEMINI_MODEL })
       
       console.log('🔄 Calling Gemini API...')
       const result = await model.generateContent(prompt)
@@ -199,6 +204,11 @@ When responding as this personality, I should be thoughtful, focus on positive i
 When responding as this personality, I should be warm, encouraging, ask meaningful questions, and focus on personal empowerment and growth.`
 }
 
+// Analysis memo hit rate across every server process sharing it
+export async function GET() {
+  return NextResponse.json({ memo: memoStats() })
+}
+
 export async function POST(request: NextRequest) {
   try {
     const { tweets } = await request.json()
@@ -216,6 +226,17 @@ export async function POST(request: NextRequest) {
     // Try to identify the user based on tweet content
     const username = extractUsernameFromContext(allText, tweets)
 
+    // Same (or nearly the same) tweets were analyzed before - skip the LLM call
+    const memo = await lookupAnalysis(tweets, MEMO_NAMESPACE)
+    if (memo) {
+      return NextResponse.json({
+        ...memo.result,
+        source: 'memoized_analysis',
+        memo: memo.match,
+        tweetsAnalyzed: tweets.length
+      })
+    }
+    
     // Try Gemini AI first (free and powerful)
     console.log(`📊 Analyzing personality for ${tweets.length} tweets...`)
     
@@ -223,12 +244,14 @@ export async function POST(request: NextRequest) {
     
     if (geminiResult.success && geminiResult.content) {
       console.log('✅ Using Gemini AI analysis')
-      return NextResponse.json({
+      const analysis = {
         personality: geminiResult.content,
         analysisDate: new Date().toISOString(),
         source: 'gemini_analysis',
         tweetsAnalyzed: tweets.length
-      })
+      }
+      await storeAnalysis(tweets, analysis, MEMO_NAMESPACE)
+      return NextResponse.json(analysis)
     }
     
     console.log('⚠️ Gemini failed, falling back to enhanced mock data')
@@ -1,12 +1,5 @@
 import { NextRequest, NextResponse } from 'next/server'
-import fs from 'fs'
-import path from 'path'
-
-interface CachedTweetData {
-  tweets: any[]
-  timestamp: number
-  username: string
-}
+import { readCached, writeCached } from '../shared-cache'
 
 interface Tweet {
   id: string
@@ -18,51 +11,9 @@ interface Tweet {
   url: string
 }
 
-const CACHE_FILE = path.join(process.cwd(), 'twitter-cache.json')
-const CACHE_DURATION = 24 * 60 * 60 * 1000 // 24 hours in milliseconds
-
-function readCache(): CachedTweetData | null {
-  try {
-    if (fs.existsSync(CACHE_FILE)) {
-      const data = JSON.parse(fs.readFileSync(CACHE_FILE, 'utf8'))
-      const now = Date.now()
-      
-      // Check if cache is still valid
-      if (now - data.timestamp < CACHE_DURATION) {
-        const hoursRemaining = Math.round((CACHE_DURATION - (now - data.timestamp)) / (1000 * 60 * 60))
-        console.log(`📱 Using server cached tweet (valid for ${hoursRemaining} more hours)`)
-        return data
-      } else {
-        console.log(`🕐 Server cache expired, will fetch fresh tweet`)
-        // Clean up expired cache
-        if (fs.existsSync(CACHE_FILE)) {
-          fs.unlinkSync(CACHE_FILE)
-        }
-      }
-    }
-  } catch (error) {
-    console.error('Cache read error:', error)
-    // Clean up corrupted cache
-    if (fs.existsSync(CACHE_FILE)) {
-      fs.unlinkSync(CACHE_FILE)
-    }
-  }
-  return null
-}
-
-function writeCache(tweets: Tweet[], username: string): void {
-  try {
-    const cacheData: CachedTweetData = {
-      tweets,
-      timestamp: Date.now(),
-      username
-    }
-    fs.writeFileSync(CACHE_FILE, JSON.stringify(cacheData, null, 2))
-    console.log(`💾 Tweet cached globally for 24 hours`)
-  } catch (error) {
-    console.error('Cache write error:', error)
-  }
-}
+const CACHE_SOURCE = 'cached_tweets_route'
+const SOFT_TTL_SECONDS = 15 * 60
+const HARD_TTL_SECONDS = 24 * 60 * 60
 
 async function fetchFreshTweet(username: string): Promise<Tweet[]> {
   console.log(`🔄 Getting latest tweet for @${username} using Twitter API...`)
@@ -147,21 +98,26 @@ export async function GET(request: NextRequest) {
     const username = 'usedoppai' // Fixed username for doppai tweets
     const forceFresh = request.nextUrl.searchParams.get('force') === 'true'
     
-    // Always fetch fresh tweet - no caching for now
-    console.log('🔄 Force refresh requested, skipping cache...')
-    
-    // Clear any existing cache
-    if (fs.existsSync(CACHE_FILE)) {
-      fs.unlinkSync(CACHE_FILE)
-      console.log('🗑️ Cleared old cache')
+    // Serve whatever either the Python scrapers or this route already cached
+    const cached = readCached(username, 1)
+    if (cached && !cached.stale && !forceFresh) {
+      return NextResponse.json({
+        success: true,
+        tweets: cached.tweets,
+        source: cached.entry.source,
+        cached: true,
+        age_seconds: cached.ageSeconds,
+        timestamp: Date.now()
+      })
     }
     
-    // Cache miss or expired - fetch fresh data
+    // Cache miss, stale or forced - fetch fresh data
     try {
       const freshTweets = await fetchFreshTweet(username)
       
-      // Cache the fresh data
-      writeCache(freshTweets, username)
+      if (freshTweets.length > 0) {
+        writeCached(CACHE_SOURCE, username, { max_tweets: 1 }, freshTweets, SOFT_TTL_SECONDS, HARD_TTL_SECONDS)
+      }
       
       return NextResponse.json({
         success: true,
@@ -174,6 +130,19 @@ export async function GET(request: NextRequest) {
     } catch (fetchError) {
       console.error('Failed to fetch fresh tweet:', fetchError)
       
+      // A stale cached tweet beats the fallback message
+      if (cached) {
+        return NextResponse.json({
+          success: true,
+          tweets: cached.tweets,
+          source: cached.entry.source,
+          cached: true,
+          stale: true,
+          age_seconds: cached.ageSeconds,
+          timestamp: Date.now()
+        })
+      }
+      
       // Return a fallback message instead of mock data
       const fallbackTweets = [{
         id: 'fallback',
@@ -185,9 +154,6 @@ export async function GET(request: NextRequest) {
         url: 'https://x.com/usedoppai'
       }]
       
-      // Cache the fallback
-      writeCache(fallbackTweets, username)
-      
       return NextResponse.json({
         success: true,
         tweets: fallbackTweets,
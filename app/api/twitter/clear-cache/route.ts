@@ -1,20 +1,26 @@
 import { NextRequest, NextResponse } from 'next/server'
 import fs from 'fs'
 import path from 'path'
+import { clearCached } from '../shared-cache'
 
-const CACHE_FILE = path.join(process.cwd(), 'twitter-cache.json')
+// Single-key cache file used before the shared cache
+const LEGACY_CACHE_FILE = path.join(process.cwd(), 'twitter-cache.json')
 
 export async function POST(request: NextRequest) {
   try {
-    // Delete cache file if it exists
-    if (fs.existsSync(CACHE_FILE)) {
-      fs.unlinkSync(CACHE_FILE)
-      console.log('🗑️ Twitter cache cleared manually')
+    // ?username=<name> clears one user, otherwise the whole shared cache
+    const username = request.nextUrl.searchParams.get('username') || undefined
+    const removed = clearCached(username)
+    console.log(`🗑️ Twitter cache cleared manually (${removed} entries${username ? ` for @${username}` : ''})`)
+    
+    if (fs.existsSync(LEGACY_CACHE_FILE)) {
+      fs.unlinkSync(LEGACY_CACHE_FILE)
     }
     
     return NextResponse.json({
       success: true,
       message: 'Cache cleared successfully',
+      removed,
       timestamp: Date.now()
     })
     
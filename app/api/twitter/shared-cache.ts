@@ -0,0 +1,165 @@
+import fs from 'fs'
+import path from 'path'
+
+// Same directory and file layout as scripts/tweet_cache.py:
+//   <TWEET_CACHE_DIR>/<username>/<source>.<param>-<value>[_...].json
+// so results scraped by either side are served by both without re-scraping
+
+// Next.js runs from the repo root, which is also the Python default
+export const CACHE_DIR = process.env.TWEET_CACHE_DIR || path.join(process.cwd(), 'tweet_cache')
+const FORMAT_VERSION = 1
+
+export interface CacheEntry {
+  format: number
+  source: string
+  username: string
+  params: Record<string, string | number>
+  stored_at: number
+  soft_expires_at: number
+  hard_expires_at: number
+  result: {
+    success: boolean
+    tweets: any[]
+    [key: string]: any
+  }
+}
+
+export interface CacheHit {
+  entry: CacheEntry
+  tweets: any[]
+  stale: boolean
+  ageSeconds: number
+}
+
+function cleanUsername(username: string): string {
+  return username.replace('@', '').toLowerCase()
+}
+
+function safeName(value: string | number): string {
+  return String(value).replace(/[^A-Za-z0-9_.-]+/g, '_')
+}
+
+function paramsName(params: Record<string, string | number>): string {
+  const keys = Object.keys(params).sort()
+  return keys.map(key => `${safeName(key)}-${safeName(params[key])}`).join('_') || 'default'
+}
+
+function rank(entry: CacheEntry, now: number): number {
+  // Any fresh entry outranks every stale one
+  return (now < entry.soft_expires_at ? 1e12 : 0) + entry.stored_at
+}
+
+function userDir(username: string): string {
+  return path.join(CACHE_DIR, safeName(cleanUsername(username)))
+}
+
+function entryPath(source: string, username: string, params: Record<string, string | number>): string {
+  return path.join(userDir(username), `${safeName(source)}.${paramsName(params)}.json`)
+}
+
+// Best successful, not hard-expired entry for a user holding at least minTweets
+// tweets (fresh before stale, then newest); the returned tweets are trimmed to minTweets
+export function readCached(username: string, minTweets: number = 1): CacheHit | null {
+  const dir = userDir(username)
+  const now = Date.now() / 1000
+  let best: CacheEntry | null = null
+
+  try {
+    if (!fs.existsSync(dir)) {
+      return null
+    }
+    for (const name of fs.readdirSync(dir)) {
+      if (!name.endsWith('.json')) {
+        continue
+      }
+      try {
+        const entry: CacheEntry = JSON.parse(fs.readFileSync(path.join(dir, name), 'utf8'))
+        if (entry.format !== FORMAT_VERSION || entry.hard_expires_at <= now) {
+          continue
+        }
+        if (!entry.result?.success || (entry.result.tweets || []).length < minTweets) {
+          continue
+        }
+        if (!best || rank(entry, now) > rank(best, now)) {
+          best = entry
+        }
+      } catch (error) {
+        // Writers rename complete files into place, so anything unreadable is skipped
+        continue
+      }
+    }
+  } catch (error) {
+    console.error('Shared cache read error:', error)
+    return null
+  }
+
+  if (!best) {
+    return null
+  }
+  const stale = now >= best.soft_expires_at
+  const ageSeconds = Math.round(now - best.stored_at)
+  console.log(`📦 Shared cache hit for @${cleanUsername(username)} from ${best.source} (${ageSeconds}s old${stale ? ', stale' : ''})`)
+  return {
+    entry: best,
+    tweets: best.result.tweets.slice(0, Math.max(minTweets, 1)),
+    stale,
+    ageSeconds
+  }
+}
+
+// Write an entry atomically (temp file + rename) so Python readers never see a partial file
+export function writeCached(
+  source: string,
+  username: string,
+  params: Record<string, string | number>,
+  tweets: any[],
+  softTtlSeconds: number,
+  hardTtlSeconds: number
+): void {
+  const now = Date.now() / 1000
+  const entry: CacheEntry = {
+    format: FORMAT_VERSION,
+    source,
+    username: cleanUsername(username),
+    params,
+    stored_at: now,
+    soft_expires_at: now + softTtlSeconds,
+    hard_expires_at: now + hardTtlSeconds,
+    result: {
+      success: true,
+      tweets,
+      username: cleanUsername(username),
+      count: tweets.length,
+      source
+    }
+  }
+
+  try {
+    const file = entryPath(source, username, params)
+    fs.mkdirSync(path.dirname(file), { recursive: true })
+    const tmpFile = `${file}.${process.pid}.tmp`
+    fs.writeFileSync(tmpFile, JSON.stringify(entry))
+    fs.renameSync(tmpFile, file)
+    console.log(`💾 Cached ${tweets.length} tweets for @${entry.username} in shared cache`)
+  } catch (error) {
+    console.error('Shared cache write error:', error)
+  }
+}
+
+// Remove one user's entries, or the whole cache; returns the number of files removed
+export function clearCached(username?: string): number {
+  const dirs = username
+    ? [userDir(username)]
+    : (fs.existsSync(CACHE_DIR) ? fs.readdirSync(CACHE_DIR).map(name => path.join(CACHE_DIR, name)) : [])
+  let removed = 0
+  for (const dir of dirs) {
+    if (!fs.existsSync(dir) || !fs.statSync(dir).isDirectory()) {
+      continue
+    }
+    for (const name of fs.readdirSync(dir)) {
+      fs.unlinkSync(path.join(dir, name))
+      removed++
+    }
+  }
+  return removed
+}
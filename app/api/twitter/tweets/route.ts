@@ -1,7 +1,13 @@
 import { NextRequest, NextResponse } from 'next/server'
+import { readCached, writeCached } from '../shared-cache'
 
 export const dynamic = 'force-dynamic'
 
+const MAX_TWEETS = 15
+const CACHE_SOURCE = 'tweets_route'
+const SOFT_TTL_SECONDS = 15 * 60
+const HARD_TTL_SECONDS = 24 * 60 * 60
+
 interface ScrapedTweet {
   id: string
   text: string
@@ -130,12 +136,25 @@ export async function POST(request: NextRequest) {
     }
 
     const cleanUsername = username.replace('@', '').toLowerCase()
-    console.log(`🚀 Scraping 15 tweets for @${cleanUsername} with API...`)
+    
+    // Reuse tweets the Python scrapers or an earlier request already cached
+    const cached = readCached(cleanUsername, MAX_TWEETS)
+    if (cached && !cached.stale) {
+      return NextResponse.json({
+        tweets: cached.tweets,
+        username: cleanUsername,
+        source: cached.entry.source,
+        cached: true,
+        message: `Loaded ${cached.tweets.length} cached tweets`
+      })
+    }
+    
+    console.log(`🚀 Scraping ${MAX_TWEETS} tweets for @${cleanUsername} with API...`)
 
     try {
       // Only use Puppeteer scraping - most reliable method
       const scraper = new TwitterScraper()
-      const scrapedTweets = await scraper.scrapeTweets(cleanUsername, 15) // Scrape 15 tweets for personality analysis
+      const scrapedTweets = await scraper.scrapeTweets(cleanUsername, MAX_TWEETS) // Scrape 15 tweets for personality analysis
       await scraper.closeBrowser()
 
       if (scrapedTweets && scrapedTweets.length > 0) {
@@ -147,6 +166,8 @@ export async function POST(request: NextRequest) {
           console.log(`${index + 1}. ${tweet.text}`)
         })
         
+        writeCached(CACHE_SOURCE, cleanUsername, { max_tweets: MAX_TWEETS }, scrapedTweets, SOFT_TTL_SECONDS, HARD_TTL_SECONDS)
+        
         return NextResponse.json({
           tweets: scrapedTweets,
           username: cleanUsername,
@@ -159,6 +180,18 @@ export async function POST(request: NextRequest) {
       console.error('❌ Puppeteer scraping failed:', scrapingError)
     }
 
+    // Stale cached tweets are still real tweets
+    if (cached) {
+      return NextResponse.json({
+        tweets: cached.tweets,
+        username: cleanUsername,
+        source: cached.entry.source,
+        cached: true,
+        stale: true,
+        message: `Loaded ${cached.tweets.length} cached tweets (${cached.ageSeconds}s old)`
+      })
+    }
+
     // If scraping fails, return error instead of mock data
     console.log(`❌ Failed to scrape tweets for @${cleanUsername}`)
     return NextResponse.json({
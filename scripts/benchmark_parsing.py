@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Parsing benchmark
+Compares full response.json() parsing with streaming extraction
+(stream_json) on payloads recorded with --record=dir, or on a synthetic
+syndication body, reporting CPU time and peak allocated memory
+"""
+
+import json
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from itertools import islice
+
+from cli_options import parse_args
+from real_tweet_scraper import SYNDICATION_PATH, SYNDICATION_FIELDS, GUEST_SEARCH_PATH, GUEST_SEARCH_FIELDS
+from response_archive import load_index, load_body
+from stream_json import CHUNK_SIZE, EACH, iter_items
+from twitter_api_scraper import V2_TWEETS_PATH, V2_TWEET_FIELDS
+
+# backend -> (url fragment of the tweet-bearing request, path, fields)
+PAYLOADS = {
+    "syndication_api": ("timeline-profile", SYNDICATION_PATH, SYNDICATION_FIELDS),
+    "guest_token": ("search/tweets.json", GUEST_SEARCH_PATH, GUEST_SEARCH_FIELDS),
+    "twitter_api_v2": ("/tweets", V2_TWEETS_PATH, V2_TWEET_FIELDS),
+}
+
+
+def select(value, path):
+    """
+    Values at path in an already parsed document
+    """
+    if not path:
+        yield value
+        return
+    step, rest = path[0], path[1:]
+    if step is EACH:
+        for item in value if isinstance(value, list) else []:
+            yield from select(item, rest)
+    elif isinstance(value, dict) and step in value:
+        yield from select(value[step], rest)
+
+def full_extract(body, path, fields, max_tweets):
+    # What the scrapers did before: parse everything, then pick
+    data = json.loads(body)
+    return [{k: v for k, v in item.items() if k in fields} for item in islice(select(data, path), max_tweets)]
+
+def streaming_extract(body, path, fields, max_tweets):
+    chunks = (body[i:i + CHUNK_SIZE] for i in range(0, len(body), CHUNK_SIZE))
+    return list(islice(iter_items(chunks, path, fields), max_tweets))
+
+def measure(extract, body, path, fields, max_tweets, repeat):
+    """
+    Best-of-repeat CPU seconds and peak traced allocation for one extraction
+    """
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.process_time()
+        items = extract(body, path, fields, max_tweets)
+        best = min(best, time.process_time() - start)
+
+    tracemalloc.start()
+    extract(body, path, fields, max_tweets)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"seconds": round(best, 6), "peak_bytes": peak, "items": len(items)}
+
+
+def recorded_payloads(archive_dir):
+    """
+    (backend, url, body) for every recorded tweet response we know how to parse
+    """
+    seen = set()
+    for entries in load_index(archive_dir).values():
+        for entry in entries:
+            payload = PAYLOADS.get(entry["backend"])
+            if not payload or payload[0] not in entry["url"] or entry["status"] != 200 or entry["body"] in seen:
+                continue
+            seen.add(entry["body"])
+            yield entry["backend"], entry["url"], load_body(archive_dir, entry["body"])
+
+def synthetic_syndication(children):
+    """
+    Syndication-shaped body with realistic per-tweet entity and user blobs
+    """
+    now = datetime.now()
+    user = {"id_str": "12", "name": "Example", "screen_name": "example", "description": "bio " * 40,
+            "profile_image_url_https": "https://pbs.twimg.com/profile_images/1/x.jpg", "followers_count": 1000}
+    items = []
+    for i in range(children):
+        created = (now - timedelta(hours=i)).strftime("%a %b %d %H:%M:%S +0000 %Y")
+        items.append({
+            "type": "tweet",
+            "entry_id": f"tweet-{i}",
+            "tweet": {
+                "id_str": str(1700000000000000000 + i),
+                "text": f"Synthetic tweet {i} about shipping things and learning in public #{i}",
+                "created_at": created,
+                "retweet_count": i % 17, "favorite_count": i % 101, "reply_count": i % 7, "quote_count": i % 3,
+                "entities": {
+                    "hashtags": [{"text": str(i), "indices": [60, 64]}],
+                    "urls": [{"url": "https://t.co/abc", "expanded_url": f"https://example.com/{i}", "indices": [0, 23]}] * 3,
+                    "user_mentions": [{"screen_name": f"friend{j}", "id_str": str(j), "indices": [j, j + 8]} for j in range(5)],
+                    "media": [{"media_url_https": f"https://pbs.twimg.com/media/{i}.jpg",
+                               "sizes": {s: {"w": 1200, "h": 675, "resize": "fit"} for s in ("thumb", "small", "medium", "large")}}]
+                },
+                "user": user
+            }
+        })
+    return json.dumps({"body": {"children": items}, "meta": {"count": children}}).encode('utf-8')
+
+
+def compare(backend, url, body, max_tweets, repeat):
+    _, path, fields = PAYLOADS[backend]
+    full = measure(full_extract, body, path, fields, max_tweets, repeat)
+    streaming = measure(streaming_extract, body, path, fields, max_tweets, repeat)
+    return {
+        "backend": backend,
+        "url": url,
+        "bytes": len(body),
+        "full": full,
+        "streaming": streaming,
+        "speedup": round(full["seconds"] / streaming["seconds"], 2) if streaming["seconds"] else None,
+        "peak_memory_ratio": round(streaming["peak_bytes"] / full["peak_bytes"], 4) if full["peak_bytes"] else None
+    }
+
+def main():
+    args, flags = parse_args(sys.argv[1:])
+    if not args and not flags.get('synthetic'):
+        print(json.dumps({
+            "error": "Usage: python benchmark_parsing.py <archive_dir> | --synthetic=children [--max-tweets=20] [--repeat=5]",
+            "success": False
+        }))
+        sys.exit(1)
+
+    max_tweets = int(flags.get('max_tweets', 20))
+    repeat = int(flags.get('repeat', 5))
+    if args:
+        payloads = list(recorded_payloads(args[0]))
+    else:
+        children = int(flags['synthetic'])
+        payloads = [("syndication_api", f"synthetic:{children}", synthetic_syndication(children))]
+
+    results = [compare(backend, url, body, max_tweets, repeat) for backend, url, body in payloads]
+    totals = {
+        name: {
+            "seconds": round(sum(r[name]["seconds"] for r in results), 6),
+            "max_peak_bytes": max((r[name]["peak_bytes"] for r in results), default=0)
+        }
+        for name in ("full", "streaming")
+    }
+    print(json.dumps({
+        "success": True,
+        "payloads": len(results),
+        "max_tweets": max_tweets,
+        "totals": totals,
+        "results": results
+    }, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,19 @@
+#!/usr/bin/env python3
+"""
+Shared command line handling for the scraper scripts
+Positional arguments stay as before; --flag and --flag=value are optional extras
+"""
+
+def parse_args(argv):
+    """
+    Split argv into positional arguments and a dict of --flags
+    """
+    positional = []
+    flags = {}
+    for arg in argv:
+        if arg.startswith('--'):
+            name, sep, value = arg[2:].partition('=')
+            flags[name.replace('-', '_')] = value if sep else True
+        else:
+            positional.append(arg)
+    return positional, flags
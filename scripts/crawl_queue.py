@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+"""
+Crawl work queue
+Hands out hash-bucket shards of usernames to crawl nodes with leases
+Stalled leases (no heartbeat) are re-queued for another node
+"""
+
+import json
+import sqlite3
+import time
+import uuid
+import zlib
+from abc import ABC, abstractmethod
+
+DEFAULT_QUEUE_FILE = "crawl_queue.db"
+DEFAULT_SHARDS = 64
+LEASE_SECONDS = 120
+NODE_TIMEOUT = 180
+
+def shard_for(username, num_shards=DEFAULT_SHARDS):
+    """
+    Stable hash bucket for a username
+    """
+    username = username.replace('@', '').lower()
+    return zlib.crc32(username.encode('utf-8')) % num_shards
+
+
+class WorkQueue(ABC):
+    """
+    Interface every queue backend implements
+    A lease is a dict with shard_id, lease_id, usernames and options
+    """
+
+    @abstractmethod
+    def enqueue(self, usernames, options=None):
+        """Add usernames to their shards and reopen those shards"""
+
+    @abstractmethod
+    def register_node(self, node_id):
+        """Announce a node so it counts towards the budget split"""
+
+    @abstractmethod
+    def active_nodes(self):
+        """Nodes seen within NODE_TIMEOUT (at least 1)"""
+
+    @abstractmethod
+    def claim(self, node_id):
+        """Lease the next pending (or stalled) shard, or None"""
+
+    @abstractmethod
+    def heartbeat(self, node_id, lease_id=None):
+        """Keep the node alive and extend its lease; False if the lease was lost"""
+
+    @abstractmethod
+    def mark_done(self, lease_id, username):
+        """Record one finished user of a leased shard"""
+
+    @abstractmethod
+    def complete(self, lease_id):
+        """Finish a shard; back to pending if users were added meanwhile"""
+
+    @abstractmethod
+    def release(self, lease_id):
+        """Hand a shard back without finishing it"""
+
+    @abstractmethod
+    def requeue_stalled(self):
+        """Return expired leases to the pending pool"""
+
+    @abstractmethod
+    def stats(self):
+        """Shard counts by state plus user and node totals"""
+
+
+class SQLiteWorkQueue(WorkQueue):
+    """
+    Queue backed by a single SQLite file, shared by all nodes on one host
+    or on a shared volume; also what tests and local runs use
+    """
+
+    def __init__(self, path=DEFAULT_QUEUE_FILE, num_shards=DEFAULT_SHARDS, lease_seconds=LEASE_SECONDS):
+        self.path = path
+        self.num_shards = num_shards
+        self.lease_seconds = lease_seconds
+        self.conn = sqlite3.connect(path, timeout=30, isolation_level=None)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS shards (
+                shard_id INTEGER PRIMARY KEY,
+                state TEXT NOT NULL DEFAULT 'pending',
+                lease_id TEXT,
+                node_id TEXT,
+                lease_expires REAL,
+                attempts INTEGER NOT NULL DEFAULT 0
+            );
+            CREATE TABLE IF NOT EXISTS users (
+                username TEXT PRIMARY KEY,
+                shard_id INTEGER NOT NULL,
+                options TEXT,
+                done INTEGER NOT NULL DEFAULT 0
+            );
+            CREATE TABLE IF NOT EXISTS nodes (
+                node_id TEXT PRIMARY KEY,
+                last_seen REAL NOT NULL
+            );
+        """)
+
+    def _write(self):
+        # Serialise writers across processes
+        self.conn.execute("BEGIN IMMEDIATE")
+
+    def enqueue(self, usernames, options=None):
+        """
+        Add usernames to their shards and reopen those shards
+        """
+        options = json.dumps(options) if options else None
+        self._write()
+        try:
+            shards = set()
+            for username in usernames:
+                username = username.replace('@', '').lower().strip()
+                if not username:
+                    continue
+                shard_id = shard_for(username, self.num_shards)
+                self.conn.execute(
+                    "INSERT INTO users (username, shard_id, options, done) VALUES (?, ?, ?, 0) "
+                    "ON CONFLICT(username) DO UPDATE SET done = 0, options = excluded.options",
+                    (username, shard_id, options)
+                )
+                shards.add(shard_id)
+            for shard_id in shards:
+                self.conn.execute(
+                    "INSERT INTO shards (shard_id, state) VALUES (?, 'pending') "
+                    "ON CONFLICT(shard_id) DO UPDATE SET state = 'pending' WHERE state = 'done'",
+                    (shard_id,)
+                )
+            self.conn.execute("COMMIT")
+            return len(shards)
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+
+    def register_node(self, node_id):
+        self.heartbeat(node_id)
+
+    def active_nodes(self):
+        cutoff = time.time() - NODE_TIMEOUT
+        row = self.conn.execute("SELECT COUNT(*) FROM nodes WHERE last_seen >= ?", (cutoff,)).fetchone()
+        return max(1, row[0])
+
+    def claim(self, node_id):
+        """
+        Lease the next pending (or stalled) shard, or None when there is no work
+        """
+        now = time.time()
+        self._write()
+        try:
+            row = self.conn.execute(
+                "SELECT shard_id FROM shards WHERE state = 'pending' "
+                "OR (state = 'leased' AND lease_expires < ?) ORDER BY attempts, shard_id LIMIT 1",
+                (now,)
+            ).fetchone()
+            if row is None:
+                self.conn.execute("COMMIT")
+                return None
+            shard_id = row[0]
+            lease_id = uuid.uuid4().hex
+            self.conn.execute(
+                "UPDATE shards SET state = 'leased', lease_id = ?, node_id = ?, lease_expires = ?, "
+                "attempts = attempts + 1 WHERE shard_id = ?",
+                (lease_id, node_id, now + self.lease_seconds, shard_id)
+            )
+            users = self.conn.execute(
+                "SELECT username, options FROM users WHERE shard_id = ? AND done = 0 ORDER BY username",
+                (shard_id,)
+            ).fetchall()
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+        return {
+            "shard_id": shard_id,
+            "lease_id": lease_id,
+            "usernames": [u["username"] for u in users],
+            "options": {u["username"]: json.loads(u["options"]) for u in users if u["options"]}
+        }
+
+    def heartbeat(self, node_id, lease_id=None):
+        """
+        Keep the node alive and extend its lease; False if the lease was lost
+        """
+        now = time.time()
+        self.conn.execute(
+            "INSERT INTO nodes (node_id, last_seen) VALUES (?, ?) "
+            "ON CONFLICT(node_id) DO UPDATE SET last_seen = excluded.last_seen",
+            (node_id, now)
+        )
+        if lease_id is None:
+            return True
+        cursor = self.conn.execute(
+            "UPDATE shards SET lease_expires = ? WHERE lease_id = ? AND state = 'leased'",
+            (now + self.lease_seconds, lease_id)
+        )
+        return cursor.rowcount == 1
+
+    def mark_done(self, lease_id, username):
+        self.conn.execute(
+            "UPDATE users SET done = 1 WHERE username = ? AND shard_id = "
+            "(SELECT shard_id FROM shards WHERE lease_id = ?)",
+            (username, lease_id)
+        )
+
+    def complete(self, lease_id):
+        """
+        Finish a shard; it goes back to pending if users were added meanwhile
+        """
+        self.conn.execute(
+            "UPDATE shards SET state = CASE WHEN EXISTS "
+            "(SELECT 1 FROM users WHERE users.shard_id = shards.shard_id AND done = 0) "
+            "THEN 'pending' ELSE 'done' END, lease_id = NULL, lease_expires = NULL WHERE lease_id = ?",
+            (lease_id,)
+        )
+
+    def release(self, lease_id):
+        """
+        Hand a shard back without finishing it (e.g. node shutting down)
+        """
+        self.conn.execute(
+            "UPDATE shards SET state = 'pending', lease_id = NULL, lease_expires = NULL WHERE lease_id = ?",
+            (lease_id,)
+        )
+
+    def requeue_stalled(self):
+        """
+        Return expired leases to the pending pool; returns how many were re-queued
+        """
+        cursor = self.conn.execute(
+            "UPDATE shards SET state = 'pending', lease_id = NULL, lease_expires = NULL "
+            "WHERE state = 'leased' AND lease_expires < ?",
+            (time.time(),)
+        )
+        return cursor.rowcount
+
+    def stats(self):
+        counts = {"pending": 0, "leased": 0, "done": 0}
+        for row in self.conn.execute("SELECT state, COUNT(*) FROM shards GROUP BY state"):
+            counts[row[0]] = row[1]
+        users = self.conn.execute("SELECT COUNT(*), COALESCE(SUM(done), 0) FROM users").fetchone()
+        counts["users"] = users[0]
+        counts["users_done"] = users[1]
+        counts["nodes"] = self.active_nodes()
+        return counts
+
+
+BACKENDS = {
+    "sqlite": SQLiteWorkQueue,
+}
+
+def open_queue(url):
+    """
+    Open a queue from 'backend://location' (plain paths mean sqlite)
+    """
+    backend, sep, location = url.partition("://")
+    if not sep:
+        backend, location = "sqlite", url
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown queue backend: {backend}")
+    return BACKENDS[backend](location)
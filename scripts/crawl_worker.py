@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+Crawl Worker
+Runs scrape_user_tweets over shards leased from a shared work queue
+Start one worker per node; each takes its share of the rate budget
+"""
+
+import importlib
+import json
+import os
+import socket
+import sys
+import threading
+import time
+
+from cli_options import parse_args
+from crawl_queue import open_queue
+from rate_limit_tracker import configure_partition
+from credential_pool import CredentialPool
+from scrape_metrics import write_prometheus
+from scrape_profiler import maybe_profiled
+
+SCRAPERS = {
+    "real": "real_tweet_scraper",
+    "api": "twitter_api_scraper",
+    "simple": "twitter_api_simple",
+    "generator": "simple_tweets",
+}
+# Scrapers that spend bearer token budget from the CredentialPool
+POOLED_SCRAPERS = {"api", "simple"}
+
+IDLE_SLEEP = 10
+
+
+class LeaseHeartbeat(threading.Thread):
+    """
+    Keeps a lease alive while a shard is being scraped
+    Uses its own queue connection since SQLite connections are per-thread
+    """
+
+    def __init__(self, queue_url, node_id, lease_id, interval):
+        super().__init__(daemon=True)
+        self.queue_url = queue_url
+        self.node_id = node_id
+        self.lease_id = lease_id
+        self.interval = interval
+        self.lost = False
+        self.stopped = threading.Event()
+
+    def run(self):
+        queue = open_queue(self.queue_url)
+        while not self.stopped.wait(self.interval):
+            try:
+                if not queue.heartbeat(self.node_id, self.lease_id):
+                    print(f"⚠️ Lease {self.lease_id[:8]} was taken over", file=sys.stderr)
+                    self.lost = True
+                    return
+            except Exception as e:
+                print(f"❌ Heartbeat failed: {str(e)}", file=sys.stderr)
+
+    def stop(self):
+        self.stopped.set()
+
+
+def write_result(output_dir, username, result):
+    """
+    Save one user's result atomically
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    path = os.path.join(output_dir, f"{username}.json")
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(result, f, ensure_ascii=True)
+    os.replace(tmp_path, path)
+
+
+def wait_for_budget(queue, node_id, metrics_file=None):
+    """
+    Block until some credential has budget left in this node's share
+    """
+    while True:
+        configure_partition(node_id, queue.active_nodes())
+        pool = CredentialPool()
+        if pool.acquire():
+            return
+        wait_time = pool.wait_time()
+        print(f"⏰ Node budget used up, waiting {int(wait_time)} seconds", file=sys.stderr)
+        # Keep the textfile fresh so a waiting node doesn't look dead
+        if metrics_file:
+            write_prometheus(metrics_file)
+        time.sleep(min(max(wait_time, 1), IDLE_SLEEP))
+        queue.heartbeat(node_id)
+
+
+def process_lease(queue, queue_url, node_id, lease, scrape_user_tweets, default_max_tweets, output_dir,
+                  metrics_file=None, profile=False, pooled=True):
+    """
+    Scrape every outstanding user in a leased shard
+    With pooled, each user waits for credential budget first
+    """
+    heartbeat = LeaseHeartbeat(queue_url, node_id, lease["lease_id"], queue.lease_seconds / 3)
+    heartbeat.start()
+    try:
+        for username in lease["usernames"]:
+            if heartbeat.lost:
+                return False
+            if pooled:
+                wait_for_budget(queue, node_id, metrics_file)
+            options = lease["options"].get(username, {})
+            # Profiling can be requested for the whole worker or per enqueued user
+            with maybe_profiled(profile or options.get("profile"), f"{node_id}_{username}"):
+                result = scrape_user_tweets(username, options.get("max_tweets", default_max_tweets))
+            if heartbeat.lost:
+                return False
+            write_result(output_dir, username, result)
+            queue.mark_done(lease["lease_id"], username)
+            if metrics_file:
+                write_prometheus(metrics_file)
+        queue.complete(lease["lease_id"])
+        return True
+    except BaseException:
+        queue.release(lease["lease_id"])
+        raise
+    finally:
+        heartbeat.stop()
+
+
+def run_worker(queue_url, node_id, scraper="real", max_tweets=50, output_dir="crawl_results", once=False,
+               metrics_file=None, profile=False):
+    """
+    Claim and process shards until the queue is drained (once) or forever
+    """
+    queue = open_queue(queue_url)
+    scrape_user_tweets = importlib.import_module(SCRAPERS[scraper]).scrape_user_tweets
+    queue.register_node(node_id)
+    print(f"🧵 Node {node_id} joined ({queue.active_nodes()} active)", file=sys.stderr)
+    if metrics_file:
+        write_prometheus(metrics_file)
+
+    while True:
+        queue.requeue_stalled()
+        queue.heartbeat(node_id)
+        lease = queue.claim(node_id)
+        if lease is None:
+            if once:
+                return queue.stats()
+            if metrics_file:
+                write_prometheus(metrics_file)
+            time.sleep(IDLE_SLEEP)
+            continue
+
+        print(f"📦 Node {node_id} leased shard {lease['shard_id']} ({len(lease['usernames'])} users)", file=sys.stderr)
+        if not process_lease(queue, queue_url, node_id, lease, scrape_user_tweets, max_tweets, output_dir,
+                             metrics_file, profile, scraper in POOLED_SCRAPERS):
+            print(f"⚠️ Abandoned shard {lease['shard_id']}", file=sys.stderr)
+
+
+def main():
+    usage = "Usage: python crawl_worker.py <enqueue|work|requeue|stats> <queue> [args]"
+    argv, flags = parse_args(sys.argv[1:])
+    if len(argv) < 2:
+        print(json.dumps({"error": usage, "success": False}))
+        sys.exit(1)
+
+    command, queue_url = argv[0], argv[1]
+    args = argv[2:]
+
+    if command == "enqueue":
+        # enqueue <queue> <usernames_file> [max_tweets] [--profile]
+        if not args:
+            print(json.dumps({"error": "Usage: python crawl_worker.py enqueue <queue> <usernames_file> [max_tweets] [--profile]", "success": False}))
+            sys.exit(1)
+        with open(args[0]) as f:
+            usernames = [line.strip() for line in f if line.strip()]
+        options = {}
+        if len(args) > 1:
+            options["max_tweets"] = int(args[1])
+        if flags.get('profile'):
+            options["profile"] = True
+        shards = open_queue(queue_url).enqueue(usernames, options)
+        print(json.dumps({"success": True, "users": len(usernames), "shards": shards}))
+    elif command == "work":
+        # work <queue> [node_id] [scraper] [max_tweets] [output_dir] [--once] [--metrics-file=PATH] [--profile]
+        node_id = args[0] if len(args) > 0 else f"{socket.gethostname()}-{os.getpid()}"
+        scraper = args[1] if len(args) > 1 else "real"
+        if scraper not in SCRAPERS:
+            print(json.dumps({"error": f"Unknown scraper: {scraper}", "success": False}))
+            sys.exit(1)
+        max_tweets = int(args[2]) if len(args) > 2 else 50
+        output_dir = args[3] if len(args) > 3 else "crawl_results"
+        stats = run_worker(queue_url, node_id, scraper, max_tweets, output_dir,
+                           bool(flags.get('once')), flags.get('metrics_file'), bool(flags.get('profile')))
+        print(json.dumps({"success": True, "stats": stats}))
+    elif command == "requeue":
+        print(json.dumps({"success": True, "requeued": open_queue(queue_url).requeue_stalled()}))
+    elif command == "stats":
+        print(json.dumps({"success": True, "stats": open_queue(queue_url).stats()}))
+    else:
+        print(json.dumps({"error": usage, "success": False}))
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
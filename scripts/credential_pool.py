@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+"""
+Bearer token credential pool
+Tracks each token's remaining budget from Twitter's rate limit headers
+and routes every request to the token with the most headroom
+"""
+
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+import urllib.parse
+
+import response_archive
+from rate_limit_tracker import REQUEST_LIMIT, WINDOW_SECONDS, can_make_request, record_request
+
+CREDENTIALS_FILE = os.getenv('TWITTER_CREDENTIALS_FILE', "twitter_credentials.json")
+STATE_FILE = "twitter_credential_state.json"
+DEFAULT_BEARER_TOKEN = "AAAAAAAAAAAAAAAAAAAAALNJfwEAAAAAm0aIfmDpV63anDHo%2FiJT%2FBnx0zs%3DApg1YFbpGF3ZiTnKVcNcaBx5M8KYDvdcXvNDHmRYKD5xgHkIRz"
+
+# Budgets tracked separately by Twitter for the endpoints the scrapers call
+USER_LOOKUP_ENDPOINT = "/2/users/by/username/:username"
+USER_TWEETS_ENDPOINT = "/2/users/:id/tweets"
+
+# A revoked token is retried after this long in case it was a transient auth error
+REVOKED_SECONDS = 24 * 60 * 60
+
+def credential_id(token):
+    """
+    Short stable id for a token, safe to log and use in file names
+    """
+    return hashlib.sha256(token.encode('utf-8')).hexdigest()[:12]
+
+def endpoint_for(url):
+    """
+    Rate limit bucket of a request URL, with ids and usernames replaced,
+    e.g. https://api.twitter.com/2/users/12/tweets -> /2/users/:id/tweets
+    """
+    parts = urllib.parse.urlparse(url or '').path.split('/')
+    # parts[1] is the API version
+    for i, part in enumerate(parts):
+        if i > 1 and part.isdigit():
+            parts[i] = ':id'
+        elif i > 0 and parts[i - 1] == 'username':
+            parts[i] = ':username'
+    return '/'.join(parts) or '/'
+
+def load_tokens():
+    """
+    Tokens from TWITTER_BEARER_TOKENS (comma separated), the credentials file
+    and TWITTER_BEARER_TOKEN, falling back to the built-in token
+    """
+    tokens = []
+    tokens.extend(t.strip() for t in os.getenv('TWITTER_BEARER_TOKENS', '').split(','))
+    try:
+        if os.path.exists(CREDENTIALS_FILE):
+            with open(CREDENTIALS_FILE, 'r') as f:
+                data = json.load(f)
+            if isinstance(data, dict):
+                data = data.get('bearer_tokens', [])
+            tokens.extend(data)
+    except Exception as e:
+        print(f"❌ Could not read {CREDENTIALS_FILE}: {str(e)}", file=sys.stderr)
+    tokens.append(os.getenv('TWITTER_BEARER_TOKEN', ''))
+
+    unique = []
+    for token in tokens:
+        if token and token not in unique:
+            unique.append(token)
+    return unique or [DEFAULT_BEARER_TOKEN]
+
+
+class CredentialPool:
+    """
+    Picks the bearer token with the most remaining budget
+    State is kept in STATE_FILE so separate script runs share it; replayed
+    responses only update a throwaway in-memory state, so a recorded 401 or
+    429 never touches the live tokens or request budgets
+    """
+
+    def __init__(self, tokens=None, state_file=STATE_FILE):
+        self.tokens = tokens or load_tokens()
+        self.live = not response_archive.replaying()
+        self.state_file = state_file if self.live else None
+        self.state = self._load_state()
+
+    def _load_state(self):
+        try:
+            if self.state_file and os.path.exists(self.state_file):
+                with open(self.state_file, 'r') as f:
+                    return json.load(f)
+        except Exception as e:
+            print(f"❌ Could not read {self.state_file}: {str(e)}", file=sys.stderr)
+        return {}
+
+    def _save_state(self):
+        """
+        Write the state atomically (temp file + rename) so concurrent runs
+        never read a half-written file and reset every budget
+        """
+        if not self.state_file:
+            return
+        tmp_path = f"{self.state_file}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, 'w') as f:
+                json.dump(self.state, f)
+            os.replace(tmp_path, self.state_file)
+        except Exception as e:
+            print(f"❌ Could not save {self.state_file}: {str(e)}", file=sys.stderr)
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+
+    def _entry(self, token):
+        entry = self.state.setdefault(credential_id(token), {"revoked_until": 0, "endpoints": {}})
+        entry.setdefault("endpoints", {})
+        return entry
+
+    def _budget(self, token, endpoint):
+        return self._entry(token)["endpoints"].setdefault(endpoint, {
+            "remaining": None,
+            "limit": None,
+            "reset": 0
+        })
+
+    def _budgets(self, token, endpoint):
+        """
+        Known budgets for one endpoint, or for every endpoint when endpoint is None
+        """
+        budgets = self._entry(token)["endpoints"]
+        if endpoint is None:
+            return list(budgets.values())
+        return [budgets[endpoint]] if endpoint in budgets else []
+
+    def headroom(self, token, now=None, endpoint=None):
+        """
+        Requests this token can still make to endpoint in the current window
+        (0 if out of rotation); without an endpoint, the tightest known budget
+        """
+        now = now or time.time()
+        entry = self._entry(token)
+        if entry["revoked_until"] > now:
+            return 0
+        if self.live and not can_make_request(credential_id(token))[0]:
+            return 0
+        remaining = [
+            budget["limit"] or REQUEST_LIMIT if budget["remaining"] is None or budget["reset"] <= now else budget["remaining"]
+            for budget in self._budgets(token, endpoint)
+        ]
+        return min(remaining) if remaining else REQUEST_LIMIT
+
+    def acquire(self, endpoint=None):
+        """
+        Token with the most headroom for endpoint, or None when every token
+        is exhausted or revoked
+        """
+        now = time.time()
+        best, best_headroom = None, 0
+        for token in self.tokens:
+            headroom = self.headroom(token, now, endpoint)
+            if headroom > best_headroom:
+                best, best_headroom = token, headroom
+        return best
+
+    def wait_time(self, endpoint=None):
+        """
+        Seconds until some token is expected to have budget for endpoint again
+        """
+        now = time.time()
+        waits = []
+        for token in self.tokens:
+            entry = self._entry(token)
+            if entry["revoked_until"] > now:
+                continue
+            local_wait = can_make_request(credential_id(token))[1] if self.live else 0
+            reset_waits = [b["reset"] - now for b in self._budgets(token, endpoint) if b["remaining"] == 0]
+            waits.append(max([local_wait, 0] + reset_waits))
+        return min(waits) if waits else WINDOW_SECONDS
+
+    def update(self, token, response, endpoint=None):
+        """
+        Record a response made with token: budget headers (per endpoint),
+        429s and auth failures
+        """
+        now = time.time()
+        entry = self._entry(token)
+        budget = self._budget(token, endpoint or endpoint_for(response.url))
+        if self.live:
+            record_request(credential_id(token))
+
+        headers = response.headers
+        try:
+            if 'x-rate-limit-remaining' in headers:
+                budget["remaining"] = int(headers['x-rate-limit-remaining'])
+            if 'x-rate-limit-limit' in headers:
+                budget["limit"] = int(headers['x-rate-limit-limit'])
+            if 'x-rate-limit-reset' in headers:
+                budget["reset"] = float(headers['x-rate-limit-reset'])
+        except ValueError:
+            pass
+
+        if response.status_code == 429:
+            budget["remaining"] = 0
+            if budget["reset"] <= now:
+                budget["reset"] = now + WINDOW_SECONDS
+            print(f"⏰ Credential {credential_id(token)} exhausted until reset", file=sys.stderr)
+        elif response.status_code in (401, 403):
+            entry["revoked_until"] = now + REVOKED_SECONDS
+            print(f"🚫 Credential {credential_id(token)} rejected ({response.status_code}), removed from rotation", file=sys.stderr)
+
+        self._save_state()
+
+    def summary(self):
+        now = time.time()
+        return [
+            {"credential": credential_id(token), "headroom": self.headroom(token, now), **self._entry(token)}
+            for token in self.tokens
+        ]
+
+
+if __name__ == "__main__":
+    print(json.dumps(CredentialPool().summary(), indent=2))
@@ -0,0 +1,320 @@
+#!/usr/bin/env python3
+"""
+Engagement Analytics
+Columnar (NumPy) view over scraped tweets for one or many users
+Answers top-k, engagement-rate percentiles, posting-time histograms and
+per-user comparisons in vectorized passes; results are cached per dataset version
+"""
+
+import json
+import os
+import sys
+from datetime import datetime, timezone
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+METRICS = ("like_count", "retweet_count", "reply_count", "quote_count")
+# Weight of each metric in the engagement score
+DEFAULT_WEIGHTS = {"like_count": 1.0, "retweet_count": 2.0, "reply_count": 1.5, "quote_count": 2.0}
+
+# v1.1 / syndication; ISO strings (v2, nitter, generator) go through fromisoformat
+LEGACY_CREATED_AT_FORMAT = "%a %b %d %H:%M:%S %z %Y"
+
+def parse_created_at(value):
+    """
+    Epoch seconds for the created_at formats our scrapers produce, or NaN
+    """
+    if not value:
+        return float('nan')
+    try:
+        parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        try:
+            parsed = datetime.strptime(value, LEGACY_CREATED_AT_FORMAT)
+        except ValueError:
+            return float('nan')
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
+class EngagementFrame:
+    """
+    Tweets stored column-wise: one array per field, users as integer codes
+    """
+
+    def __init__(self, weights=None):
+        if np is None:
+            raise ImportError("engagement_analytics needs numpy: pip install numpy")
+        self.weights = dict(DEFAULT_WEIGHTS, **(weights or {}))
+        self.users = []
+        self._user_codes = {}
+        self.user = np.zeros(0, dtype=np.int32)
+        self.metrics = {name: np.zeros(0, dtype=np.int64) for name in METRICS}
+        self.created = np.zeros(0, dtype=np.float64)
+        self.ids = []
+        self.texts = []
+        # Appended columns wait here until the next query concatenates them once
+        self._chunks = []
+        self.version = 0
+        self._cache = {}
+        self._cache_version = 0
+
+    # Loading
+
+    def add_tweets(self, username, tweets):
+        """
+        Append one user's tweets; bumps the dataset version
+        """
+        username = username.replace('@', '').lower()
+        if not tweets:
+            return
+        code = self._user_codes.get(username)
+        if code is None:
+            code = self._user_codes[username] = len(self.users)
+            self.users.append(username)
+
+        chunk = {
+            "user": np.full(len(tweets), code, dtype=np.int32),
+            "created": np.fromiter((parse_created_at(t.get('created_at')) for t in tweets), dtype=np.float64, count=len(tweets))
+        }
+        for name in METRICS:
+            chunk[name] = np.fromiter((int(t.get(name) or 0) for t in tweets), dtype=np.int64, count=len(tweets))
+        self._chunks.append(chunk)
+        self.ids.extend(str(t.get('id', '')) for t in tweets)
+        self.texts.extend(t.get('text', '') for t in tweets)
+        self.version += 1
+
+    def add_result(self, result):
+        """
+        Append a scrape_user_tweets result
+        """
+        if result.get("success"):
+            self.add_tweets(result.get("username", ""), result.get("tweets", []))
+
+    @classmethod
+    def from_results(cls, results, weights=None):
+        frame = cls(weights)
+        for result in results:
+            frame.add_result(result)
+        return frame
+
+    @classmethod
+    def from_directory(cls, path, weights=None):
+        """
+        Load every <username>.json result in a directory (e.g. crawl_results)
+        """
+        frame = cls(weights)
+        for name in sorted(os.listdir(path)):
+            if not name.endswith('.json'):
+                continue
+            try:
+                with open(os.path.join(path, name), 'r') as f:
+                    frame.add_result(json.load(f))
+            except Exception as e:
+                print(f"❌ Skipping {name}: {str(e)}", file=sys.stderr)
+        return frame
+
+    def __len__(self):
+        return len(self.ids)
+
+    def _consolidate(self):
+        if not self._chunks:
+            return
+        chunks, self._chunks = self._chunks, []
+        self.user = np.concatenate([self.user] + [c["user"] for c in chunks])
+        self.created = np.concatenate([self.created] + [c["created"] for c in chunks])
+        for name in METRICS:
+            self.metrics[name] = np.concatenate([self.metrics[name]] + [c[name] for c in chunks])
+
+    # Caching
+
+    def _cached(self, key, compute):
+        self._consolidate()
+        if self._cache_version != self.version:
+            self._cache.clear()
+            self._cache_version = self.version
+        if key not in self._cache:
+            self._cache[key] = compute()
+        return self._cache[key]
+
+    def _user_mask(self, username):
+        if username is None:
+            return slice(None)
+        code = self._user_codes.get(username.replace('@', '').lower())
+        return self.user == (-1 if code is None else code)
+
+    # Columns
+
+    def engagement(self):
+        """
+        Weighted engagement score per tweet
+        """
+        def compute():
+            score = np.zeros(len(self), dtype=np.float64)
+            for name in METRICS:
+                score += self.weights[name] * self.metrics[name]
+            return score
+        return self._cached(("engagement",), compute)
+
+    def engagement_rate(self):
+        """
+        Engagement relative to the author's mean engagement (1.0 = typical tweet)
+        """
+        def compute():
+            score = self.engagement()
+            # bincount of an empty frame is int64 even with float weights
+            totals = np.bincount(self.user, weights=score, minlength=len(self.users)).astype(np.float64)
+            counts = np.bincount(self.user, minlength=len(self.users))
+            means = np.divide(totals, counts, out=np.zeros_like(totals), where=counts > 0)
+            user_mean = means[self.user]
+            return np.divide(score, user_mean, out=np.zeros_like(score), where=user_mean > 0)
+        return self._cached(("engagement_rate",), compute)
+
+    # Queries
+
+    def top_k(self, k=10, username=None, by="engagement"):
+        """
+        The k tweets with the highest engagement (or engagement_rate)
+        """
+        def compute():
+            values = self.engagement_rate() if by == "engagement_rate" else self.engagement()
+            rows = np.arange(len(self))[self._user_mask(username)]
+            if len(rows) == 0:
+                return []
+            subset = values[rows]
+            n = min(k, len(rows))
+            best = np.argpartition(-subset, n - 1)[:n]
+            best = best[np.argsort(-subset[best], kind='stable')]
+            return [self.row(int(rows[i]), float(subset[i])) for i in best]
+        return self._cached(("top_k", k, username, by), compute)
+
+    def row(self, i, score=None):
+        tweet = {
+            "username": self.users[self.user[i]],
+            "id": self.ids[i],
+            "text": self.texts[i],
+        }
+        for name in METRICS:
+            tweet[name] = int(self.metrics[name][i])
+        if score is not None:
+            tweet["score"] = round(score, 4)
+        return tweet
+
+    def engagement_rate_percentiles(self, percentiles=(50, 75, 90, 99)):
+        """
+        Percentiles of engagement rate per user, computed for all users at once
+        """
+        def compute():
+            if not len(self):
+                return {}
+            rate = self.engagement_rate()
+            order = np.lexsort((rate, self.user))
+            sorted_rate = rate[order]
+            counts = np.bincount(self.user, minlength=len(self.users))
+            starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+            result = {}
+            for q in percentiles:
+                # Linear interpolation inside each user's sorted block
+                position = starts + (q / 100.0) * np.maximum(counts - 1, 0)
+                lower = np.floor(position).astype(np.int64)
+                upper = np.minimum(lower + 1, starts + np.maximum(counts - 1, 0))
+                fraction = position - lower
+                values = sorted_rate[lower] * (1 - fraction) + sorted_rate[upper] * fraction
+                result[f"p{q}"] = values
+            return {
+                user: {name: round(float(values[code]), 4) for name, values in result.items()}
+                for code, user in enumerate(self.users) if counts[code]
+            }
+        return self._cached(("engagement_rate_percentiles", tuple(percentiles)), compute)
+
+    def _time_histogram(self, bins, to_bin):
+        valid = ~np.isnan(self.created)
+        codes = self.user[valid]
+        values = to_bin(self.created[valid].astype(np.int64))
+        flat = np.bincount(codes * bins + values, minlength=len(self.users) * bins)
+        return {user: flat[code * bins:(code + 1) * bins].tolist() for code, user in enumerate(self.users)}
+
+    def hour_histogram(self):
+        """
+        Tweets per UTC hour of day, per user
+        """
+        return self._cached(("hour_histogram",), lambda: self._time_histogram(24, lambda t: (t // 3600) % 24))
+
+    def weekday_histogram(self):
+        """
+        Tweets per UTC weekday (Monday = 0), per user
+        """
+        # 1970-01-01 was a Thursday (weekday 3)
+        return self._cached(("weekday_histogram",), lambda: self._time_histogram(7, lambda t: (t // 86400 + 3) % 7))
+
+    def compare_users(self):
+        """
+        Per-user totals, means, medians and posting rate
+        """
+        def compute():
+            n_users = len(self.users)
+            score = self.engagement()
+            counts = np.bincount(self.user, minlength=n_users)
+            safe_counts = np.maximum(counts, 1)
+            summary = {
+                "tweets": counts,
+                "engagement_total": np.bincount(self.user, weights=score, minlength=n_users),
+            }
+            summary["engagement_mean"] = summary["engagement_total"] / safe_counts
+            for name in METRICS:
+                summary[f"{name}_mean"] = np.bincount(self.user, weights=self.metrics[name], minlength=n_users) / safe_counts
+
+            order = np.lexsort((score, self.user))
+            starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+            middle = starts + np.maximum(counts - 1, 0) // 2
+            middle_upper = starts + np.maximum(counts, 1) // 2
+            middle_upper = np.where(counts % 2 == 0, middle_upper, middle)
+            sorted_score = score[order]
+            summary["engagement_median"] = (sorted_score[middle] + sorted_score[middle_upper]) / 2 if len(self) else counts * 0.0
+
+            valid = ~np.isnan(self.created)
+            first = np.full(n_users, np.inf)
+            last = np.full(n_users, -np.inf)
+            np.minimum.at(first, self.user[valid], self.created[valid])
+            np.maximum.at(last, self.user[valid], self.created[valid])
+            days = np.where(last > first, (last - first) / 86400.0, np.nan)
+            summary["tweets_per_day"] = np.where(days > 0, counts / np.where(days > 0, days, 1), np.nan)
+
+            return {
+                user: {
+                    name: (int(values[code]) if values.dtype.kind in 'iu'
+                           else None if np.isnan(float(values[code])) else round(float(values[code]), 4))
+                    for name, values in summary.items()
+                }
+                for code, user in enumerate(self.users) if counts[code]
+            }
+        return self._cached(("compare_users",), compute)
+
+
+def main():
+    if len(sys.argv) < 2:
+        print(json.dumps({
+            "error": "Usage: python engagement_analytics.py <results_dir> [top_k]",
+            "success": False
+        }))
+        sys.exit(1)
+
+    frame = EngagementFrame.from_directory(sys.argv[1])
+    k = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    print(json.dumps({
+        "success": True,
+        "users": len(frame.users),
+        "tweets": len(frame),
+        "top": frame.top_k(k),
+        "engagement_rate_percentiles": frame.engagement_rate_percentiles(),
+        "users_compared": frame.compare_users(),
+        "hour_histogram": frame.hour_histogram(),
+        "weekday_histogram": frame.weekday_histogram()
+    }, ensure_ascii=True, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -2,62 +2,93 @@
 """
 Rate limit tracker for Twitter API
 Helps avoid hitting rate limits by tracking requests
+Budgets can be partitioned per node and per credential
 """
 
 import json
 import time
 import os
 
+from scrape_metrics import inc
+
 RATE_LIMIT_FILE = "twitter_rate_limits.json"
 
-def load_rate_limits():
+# Twitter API v2 allows 300 requests per 15 minutes for user lookup
+# Let's be conservative and use 250
+REQUEST_LIMIT = 250
+WINDOW_SECONDS = 900
+
+# Set by crawl workers so that all nodes together stay under REQUEST_LIMIT
+_partition = {"node_id": None, "nodes": 1}
+
+def configure_partition(node_id=None, nodes=1):
+    """Give this process its share of the budget when running as one of several nodes"""
+    _partition["node_id"] = node_id
+    _partition["nodes"] = max(1, int(nodes))
+
+def partition_limit(limit=REQUEST_LIMIT):
+    """Requests this node may make per window"""
+    return max(1, limit // _partition["nodes"])
+
+def rate_limit_file(credential=None):
+    """Budget file for the current node and credential"""
+    parts = [p for p in (credential, _partition["node_id"]) if p]
+    if not parts:
+        return RATE_LIMIT_FILE
+    base, ext = os.path.splitext(RATE_LIMIT_FILE)
+    return f"{base}.{'.'.join(parts)}{ext}"
+
+def load_rate_limits(credential=None):
     """Load rate limit data from file"""
     try:
-        if os.path.exists(RATE_LIMIT_FILE):
-            with open(RATE_LIMIT_FILE, 'r') as f:
+        path = rate_limit_file(credential)
+        if os.path.exists(path):
+            with open(path, 'r') as f:
                 data = json.load(f)
                 return data
         return {"requests": [], "last_reset": time.time()}
     except:
         return {"requests": [], "last_reset": time.time()}
 
-def save_rate_limits(data):
+def save_rate_limits(data, credential=None):
     """Save rate limit data to file"""
     try:
-        with open(RATE_LIMIT_FILE, 'w') as f:
+        with open(rate_limit_file(credential), 'w') as f:
             json.dump(data, f)
     except:
         pass
 
-def can_make_request():
+def can_make_request(credential=None):
     """Check if we can make a request without hitting rate limit"""
-    data = load_rate_limits()
+    data = load_rate_limits(credential)
     current_time = time.time()
     
     # Reset every 15 minutes (900 seconds)
-    if current_time - data["last_reset"] > 900:
+    if current_time - data["last_reset"] > WINDOW_SECONDS:
         data = {"requests": [], "last_reset": current_time}
-        save_rate_limits(data)
+        save_rate_limits(data, credential)
+        inc("rate_limit_checks_total", result="allowed")
         return True, 0
     
     # Remove requests older than 15 minutes
-    data["requests"] = [req for req in data["requests"] if current_time - req < 900]
+    data["requests"] = [req for req in data["requests"] if current_time - req < WINDOW_SECONDS]
     
-    # Twitter API v2 allows 300 requests per 15 minutes for user lookup
-    # Let's be conservative and use 250
-    if len(data["requests"]) >= 250:
+    if len(data["requests"]) >= partition_limit():
         # Calculate time until next reset
-        wait_time = 900 - (current_time - data["last_reset"])
+        wait_time = WINDOW_SECONDS - (current_time - data["last_reset"])
+        inc("rate_limit_checks_total", result="denied")
         return False, wait_time
     
+    inc("rate_limit_checks_total", result="allowed")
     return True, 0
 
-def record_request():
+def record_request(credential=None):
     """Record that we made a request"""
-    data = load_rate_limits()
+    data = load_rate_limits(credential)
     current_time = time.time()
     data["requests"].append(current_time)
-    save_rate_limits(data)
+    save_rate_limits(data, credential)
+    inc("rate_limit_recorded_requests_total")
 
 if __name__ == "__main__":
     can_request, wait_time = can_make_request()
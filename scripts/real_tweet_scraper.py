@@ -12,11 +12,27 @@ import re
 from datetime import datetime
 import time
 
-def scrape_with_syndication_api(username, max_tweets=50):
+from cli_options import parse_args
+from scrape_metrics import timed_request, record_parse, record_tweets, summary
+import response_archive
+from result_cache import swr_cached
+from scrape_deadline import Deadline, MIN_REQUEST_SECONDS
+from scrape_profiler import stage, maybe_profiled
+from stream_json import EACH, iter_response_items
+
+# Fields kept from each item; an item is decoded whole and the other keys
+# dropped, while everything outside the items is skipped undecoded
+SYNDICATION_PATH = ("body", "children", EACH, "tweet")
+SYNDICATION_FIELDS = {"id_str", "text", "created_at", "retweet_count", "favorite_count", "reply_count", "quote_count"}
+GUEST_SEARCH_PATH = ("statuses", EACH)
+GUEST_SEARCH_FIELDS = {"id_str", "full_text", "text", "created_at", "retweet_count", "favorite_count", "quote_count"}
+
+def scrape_with_syndication_api(username, max_tweets=50, deadline=None):
     """
     Use Twitter's public syndication API (no auth required)
     """
     try:
+        deadline = Deadline.coerce(deadline)
         print(f"🔍 Trying Twitter Syndication API for @{username}...", file=sys.stderr)
         
         # Twitter's public syndication endpoint
@@ -35,36 +51,44 @@ def scrape_with_syndication_api(username, max_tweets=50):
             'showRetweets': 'false'
         }
         
-        response = requests.get(url, headers=headers, params=params, timeout=10)
+        stage('fetch', 'syndication_api')
+        deadline.check()
+        response = timed_request('syndication_api', requests.get, url, headers=headers, params=params,
+                                 timeout=deadline.timeout(), stream=True)
         
         if response.status_code == 200:
-            data = response.json()
+            parse_start = time.perf_counter()
+            stage('parse', 'syndication_api')
+            items = []
             
-            if 'body' in data and 'children' in data['body']:
-                tweets = []
-                
-                for item in data['body']['children']:
-                    if 'tweet' in item:
-                        tweet_data = item['tweet']
-                        
-                        tweet = {
-                            "id": str(tweet_data.get('id_str', '')),
-                            "text": tweet_data.get('text', ''),
-                            "created_at": tweet_data.get('created_at', ''),
-                            "date": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                            "retweet_count": tweet_data.get('retweet_count', 0),
-                            "like_count": tweet_data.get('favorite_count', 0),
-                            "reply_count": tweet_data.get('reply_count', 0),
-                            "quote_count": tweet_data.get('quote_count', 0),
-                            "url": f"https://twitter.com/{username}/status/{tweet_data.get('id_str', '')}"
-                        }
-                        
-                        if tweet['text'] and len(tweet['text']) > 10:
-                            tweets.append(tweet)
-                
-                if tweets:
-                    print(f"✅ Syndication API: Got {len(tweets)} real tweets", file=sys.stderr)
-                    return tweets
+            # Stream the items, stopping once we have enough usable ones
+            for tweet_data in iter_response_items(response, SYNDICATION_PATH, SYNDICATION_FIELDS):
+                text = tweet_data.get('text', '')
+                if text and len(text) > 10:
+                    items.append(tweet_data)
+                    if len(items) >= max_tweets:
+                        break
+            
+            stage('normalize', 'syndication_api')
+            tweets = []
+            for tweet_data in items:
+                tweets.append({
+                    "id": str(tweet_data.get('id_str', '')),
+                    "text": tweet_data.get('text', ''),
+                    "created_at": tweet_data.get('created_at', ''),
+                    "date": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                    "retweet_count": tweet_data.get('retweet_count', 0),
+                    "like_count": tweet_data.get('favorite_count', 0),
+                    "reply_count": tweet_data.get('reply_count', 0),
+                    "quote_count": tweet_data.get('quote_count', 0),
+                    "url": f"https://twitter.com/{username}/status/{tweet_data.get('id_str', '')}"
+                })
+            
+            record_parse('syndication_api', time.perf_counter() - parse_start)
+            record_tweets('syndication_api', len(tweets))
+            if tweets:
+                print(f"✅ Syndication API: Got {len(tweets)} real tweets", file=sys.stderr)
+                return tweets
         
         print(f"❌ Syndication API failed for @{username}", file=sys.stderr)
         return []
@@ -73,11 +97,12 @@ def scrape_with_syndication_api(username, max_tweets=50):
         print(f"❌ Syndication API error: {str(e)}", file=sys.stderr)
         return []
 
-def scrape_with_guest_token(username, max_tweets=50):
+def scrape_with_guest_token(username, max_tweets=50, deadline=None):
     """
     Use Twitter's guest token approach
     """
     try:
+        deadline = Deadline.coerce(deadline)
         print(f"🔍 Trying Guest Token method for @{username}...", file=sys.stderr)
         
         # Get guest token
@@ -88,9 +113,12 @@ def scrape_with_guest_token(username, max_tweets=50):
         })
         
         # Activate guest token
-        activate_response = session.post(
+        stage('fetch', 'guest_token')
+        deadline.check()
+        activate_response = timed_request(
+            'guest_token', session.post,
             'https://api.twitter.com/1.1/guest/activate.json',
-            timeout=10
+            method="POST", timeout=deadline.timeout()
         )
         
         if activate_response.status_code == 200:
@@ -107,14 +135,26 @@ def scrape_with_guest_token(username, max_tweets=50):
                 'tweet_mode': 'extended'
             }
             
-            search_response = session.get(search_url, params=params, timeout=10)
+            deadline.check()
+            search_response = timed_request('guest_token', session.get, search_url, params=params,
+                                            timeout=deadline.timeout(), stream=True)
             
             if search_response.status_code == 200:
-                data = search_response.json()
-                tweets = []
+                parse_start = time.perf_counter()
+                stage('parse', 'guest_token')
+                items = []
+                
+                for tweet_data in iter_response_items(search_response, GUEST_SEARCH_PATH, GUEST_SEARCH_FIELDS):
+                    text = tweet_data.get('full_text', tweet_data.get('text', ''))
+                    if text and len(text) > 10:
+                        items.append(tweet_data)
+                        if len(items) >= max_tweets:
+                            break
                 
-                for tweet_data in data.get('statuses', []):
-                    tweet = {
+                stage('normalize', 'guest_token')
+                tweets = []
+                for tweet_data in items:
+                    tweets.append({
                         "id": str(tweet_data.get('id_str', '')),
                         "text": tweet_data.get('full_text', tweet_data.get('text', '')),
                         "created_at": tweet_data.get('created_at', ''),
@@ -124,11 +164,10 @@ def scrape_with_guest_token(username, max_tweets=50):
                         "reply_count": 0,
                         "quote_count": tweet_data.get('quote_count', 0),
                         "url": f"https://twitter.com/{username}/status/{tweet_data.get('id_str', '')}"
-                    }
-                    
-                    if tweet['text'] and len(tweet['text']) > 10:
-                        tweets.append(tweet)
+                    })
                 
+                record_parse('guest_token', time.perf_counter() - parse_start)
+                record_tweets('guest_token', len(tweets))
                 if tweets:
                     print(f"✅ Guest Token: Got {len(tweets)} real tweets", file=sys.stderr)
                     return tweets
@@ -140,10 +179,11 @@ def scrape_with_guest_token(username, max_tweets=50):
         print(f"❌ Guest Token error: {str(e)}", file=sys.stderr)
         return []
 
-def scrape_with_nitter_instances(username, max_tweets=50):
+def scrape_with_nitter_instances(username, max_tweets=50, deadline=None):
     """
     Try multiple Nitter instances for real tweet scraping
     """
+    deadline = Deadline.coerce(deadline)
     nitter_instances = [
         'nitter.poast.org',
         'nitter.privacydev.net', 
@@ -153,6 +193,9 @@ def scrape_with_nitter_instances(username, max_tweets=50):
     ]
     
     for instance in nitter_instances:
+        if not deadline.can_fit(MIN_REQUEST_SECONDS):
+            print("⏱️ No time left for remaining Nitter instances", file=sys.stderr)
+            break
         try:
             print(f"🌐 Trying Nitter instance: {instance}", file=sys.stderr)
             
@@ -162,18 +205,25 @@ def scrape_with_nitter_instances(username, max_tweets=50):
                 'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8'
             }
             
-            response = requests.get(url, headers=headers, timeout=10)
+            stage('fetch', instance)
+            response = timed_request('nitter', requests.get, url, headers=headers, timeout=deadline.timeout())
             
             if response.status_code == 200 and len(response.content) > 5000:
                 # Use BeautifulSoup to extract tweets
                 from bs4 import BeautifulSoup
+                parse_start = time.perf_counter()
+                stage('parse', instance)
                 soup = BeautifulSoup(response.content, 'html.parser')
                 
                 # Look for tweet containers
                 tweet_containers = soup.find_all(['div'], class_=lambda x: x and 'tweet' in x.lower())
                 
                 tweets = []
+                stage('normalize', instance)
                 for container in tweet_containers[:max_tweets]:
+                    # Out of time: keep what we have, the caller flags it as partial
+                    if deadline.expired():
+                        break
                     # Extract tweet text
                     text_elem = container.find(['div', 'p'], class_=lambda x: x and 'tweet' in x.lower() and 'content' in x.lower())
                     if not text_elem:
@@ -195,6 +245,8 @@ def scrape_with_nitter_instances(username, max_tweets=50):
                             }
                             tweets.append(tweet)
                 
+                record_parse('nitter', time.perf_counter() - parse_start)
+                record_tweets('nitter', len(tweets))
                 if tweets:
                     print(f"✅ Nitter {instance}: Got {len(tweets)} real tweets", file=sys.stderr)
                     return tweets
@@ -207,28 +259,51 @@ def scrape_with_nitter_instances(username, max_tweets=50):
     
     return []
 
-def scrape_user_tweets(username, max_tweets=50):
+# Fallback chain in priority order, with the least time each backend needs to be worth trying
+METHODS = [
+    ('syndication_api', scrape_with_syndication_api, 1.0),
+    ('guest_token', scrape_with_guest_token, 2.0),
+    ('nitter_scraping', scrape_with_nitter_instances, 1.0),
+]
+
+@swr_cached('real_tweet_scraper')
+def scrape_user_tweets(username, max_tweets=50, deadline=None):
     """
     Try multiple real scraping methods
+    deadline is a total time budget in seconds shared by the whole chain
     """
     try:
+        deadline = Deadline.coerce(deadline)
         username = username.replace('@', '').lower()
         print(f"🔍 Scraping REAL tweets from @{username} for personality analysis...", file=sys.stderr)
         
-        # Method 1: Syndication API
-        tweets = scrape_with_syndication_api(username, max_tweets)
-        if tweets:
-            return format_result(tweets, username, 'syndication_api')
-        
-        # Method 2: Guest Token
-        tweets = scrape_with_guest_token(username, max_tweets)
-        if tweets:
-            return format_result(tweets, username, 'guest_token')
+        skipped = []
+        for source, method, min_seconds in METHODS:
+            # Skip lower-priority backends the remaining budget can't fit
+            if not deadline.can_fit(min_seconds):
+                print(f"⏱️ Skipping {source}: {deadline.remaining():.1f}s left", file=sys.stderr)
+                skipped.append(source)
+                continue
+            
+            tweets = method(username, max_tweets, deadline)
+            if tweets:
+                return format_result(tweets, username, source, partial=deadline.expired())
+            # Ran out of time partway through (e.g. Nitter instances left untried)
+            if not deadline.can_fit(MIN_REQUEST_SECONDS):
+                print(f"⏱️ {source} cut short: {deadline.remaining():.1f}s left", file=sys.stderr)
+                skipped.append(source)
         
-        # Method 3: Nitter instances
-        tweets = scrape_with_nitter_instances(username, max_tweets)
-        if tweets:
-            return format_result(tweets, username, 'nitter_scraping')
+        if skipped:
+            print(f"❌ Deadline exceeded for @{username}", file=sys.stderr)
+            return {
+                "success": False,
+                "error": f"Deadline of {deadline.seconds}s exceeded before any method returned tweets.",
+                "tweets": [],
+                "username": username,
+                "source": "deadline_exceeded",
+                "partial": True,
+                "skipped": skipped
+            }
         
         # If all methods fail
         print(f"❌ All real scraping methods failed for @{username}", file=sys.stderr)
@@ -250,7 +325,7 @@ def scrape_user_tweets(username, max_tweets=50):
             "source": "error"
         }
 
-def format_result(tweets, username, source):
+def format_result(tweets, username, source, partial=False):
     """
     Format the successful result
     """
@@ -268,22 +343,33 @@ def format_result(tweets, username, source):
         "username": username,
         "count": len(tweets),
         "source": source,
+        "partial": partial,
         "note": f"Real tweets scraped from @{username} for personality analysis"
     }
 
 def main():
-    if len(sys.argv) < 2:
+    args, flags = parse_args(sys.argv[1:])
+    if len(args) < 1:
         print(json.dumps({
-            "error": "Usage: python real_tweet_scraper.py <username> [max_tweets]",
+            "error": "Usage: python real_tweet_scraper.py <username> [max_tweets] [--deadline=seconds] [--metrics] [--profile[=path]] [--no-cache] [--record=dir | --replay=dir [--replay-speed=x]]",
             "success": False
         }))
         sys.exit(1)
     
-    username = sys.argv[1]
-    max_tweets = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    username = args[0]
+    max_tweets = int(args[1]) if len(args) > 1 else 50
+    
+    # Recording and replaying must reach the backends, so they skip the cache
+    response_archive.configure_from_flags(flags)
+    use_cache = not (flags.get('no_cache') or flags.get('record') or flags.get('replay'))
     
-    result = scrape_user_tweets(username, max_tweets)
-    print(json.dumps(result, ensure_ascii=True, indent=2))
+    with maybe_profiled(flags.get('profile'), f"real_tweet_scraper_{username}", flags.get('profile')):
+        result = scrape_user_tweets(username, max_tweets, use_cache=use_cache, deadline=flags.get('deadline'))
+        if flags.get('metrics'):
+            result["metrics"] = summary()
+        stage('serialize')
+        output = json.dumps(result, ensure_ascii=True, indent=2)
+    print(output, flush=True)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+Response archive
+Records raw backend HTTP responses (status, headers, body) into a
+compressed, content-addressed archive and replays them instead of the network
+Layout: <dir>/index.jsonl plus <dir>/blobs/<sha256>.gz (bodies are deduplicated)
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+from datetime import datetime
+
+# mode is None (live), "record" or "replay"; speed 0 replays without delays
+_config = {"mode": None, "path": None, "speed": 0.0}
+_lock = threading.Lock()
+_replay_index = None
+_replay_cursors = {}
+
+
+class ReplayMiss(Exception):
+    """No recorded response for a request in replay mode"""
+
+
+def configure(mode=None, path=None, speed=0.0):
+    """
+    Switch every backend between live, record and replay
+    """
+    global _replay_index
+    if mode not in (None, "record", "replay"):
+        raise ValueError(f"Unknown archive mode: {mode}")
+    with _lock:
+        _config.update(mode=mode, path=path, speed=float(speed))
+        _replay_index = None
+        _replay_cursors.clear()
+
+def configure_from_flags(flags):
+    """
+    Apply --record=DIR or --replay=DIR [--replay-speed=X] from the command line
+    """
+    if flags.get('record'):
+        configure("record", flags['record'])
+    elif flags.get('replay'):
+        configure("replay", flags['replay'], flags.get('replay_speed', 0))
+
+def replaying():
+    """
+    True when responses come from the archive rather than the network
+    """
+    return _config["mode"] == "replay"
+
+def pause(seconds):
+    """
+    time.sleep for backoff between requests; in replay mode it follows
+    --replay-speed like recorded latencies (no wait at speed 0)
+    """
+    if not replaying():
+        time.sleep(seconds)
+    elif _config["speed"] > 0:
+        time.sleep(seconds / _config["speed"])
+
+def request_key(method, url, params=None):
+    """
+    Identity of a request: method, URL and sorted query parameters
+    """
+    canonical = json.dumps([method.upper(), url, sorted((params or {}).items())], default=str)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+def _blob_path(root, digest):
+    return os.path.join(root, "blobs", f"{digest}.gz")
+
+def store_body(root, body):
+    """
+    Write a body once under its sha256; returns the digest
+    """
+    digest = hashlib.sha256(body).hexdigest()
+    path = _blob_path(root, digest)
+    if not os.path.exists(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with gzip.open(tmp_path, 'wb') as f:
+            f.write(body)
+        os.replace(tmp_path, path)
+    return digest
+
+def load_body(root, digest):
+    with gzip.open(_blob_path(root, digest), 'rb') as f:
+        return f.read()
+
+def record(backend, method, url, params, response, elapsed):
+    # Reads the whole body, so a recorded stream=True response is replayed
+    # to the caller from memory
+    root = _config["path"]
+    entry = {
+        "key": request_key(method, url, params),
+        "backend": backend,
+        "method": method.upper(),
+        "url": url,
+        "params": params,
+        "status": response.status_code,
+        "headers": dict(response.headers),
+        "body": store_body(root, response.content or b""),
+        "elapsed": round(elapsed, 6),
+        "recorded_at": datetime.now().isoformat()
+    }
+    line = json.dumps(entry, ensure_ascii=True, default=str) + "\n"
+    with _lock:
+        with open(os.path.join(root, "index.jsonl"), 'a') as f:
+            f.write(line)
+
+def load_index(root):
+    """
+    Recorded entries grouped by request key, in recording order
+    """
+    index = {}
+    with open(os.path.join(root, "index.jsonl"), 'r') as f:
+        for line in f:
+            if line.strip():
+                entry = json.loads(line)
+                index.setdefault(entry["key"], []).append(entry)
+    return index
+
+def build_response(root, entry):
+    """
+    requests.Response rebuilt from an archive entry
+    """
+    import requests
+    from requests.structures import CaseInsensitiveDict
+
+    response = requests.models.Response()
+    response.status_code = entry["status"]
+    response.headers = CaseInsensitiveDict(entry["headers"])
+    response._content = load_body(root, entry["body"])
+    # Lets iter_content (stream=True readers) walk the stored body
+    response._content_consumed = True
+    response.url = entry["url"]
+    response.encoding = requests.utils.get_encoding_from_headers(response.headers) or 'utf-8'
+    return response
+
+def replay(method, url, params):
+    """
+    Serve the next recorded response for this request; identical requests
+    get their recordings in order and the last one repeats
+    """
+    global _replay_index
+    root = _config["path"]
+    key = request_key(method, url, params)
+    with _lock:
+        if _replay_index is None:
+            _replay_index = load_index(root)
+        entries = _replay_index.get(key)
+        if not entries:
+            raise ReplayMiss(f"No recorded response for {method.upper()} {url}")
+        cursor = _replay_cursors.get(key, 0)
+        _replay_cursors[key] = cursor + 1
+        entry = entries[min(cursor, len(entries) - 1)]
+
+    if _config["speed"] > 0:
+        time.sleep(entry["elapsed"] / _config["speed"])
+    return build_response(root, entry)
+
+
+def send(backend, method, send_fn, url, **kwargs):
+    """
+    send_fn(url, **kwargs) in live mode, recorded in record mode, or
+    answered from the archive in replay mode
+    method ("GET", "POST", ...) is part of the request key, so it is given
+    explicitly rather than taken from send_fn, which may be wrapped or mocked
+    """
+    params = kwargs.get('params')
+    mode = _config["mode"]
+
+    if mode == "replay":
+        return replay(method, url, params)
+
+    start = time.perf_counter()
+    response = send_fn(url, **kwargs)
+    if mode == "record":
+        try:
+            record(backend, method, url, params, response, time.perf_counter() - start)
+        except Exception as e:
+            print(f"❌ Could not archive response: {str(e)}", file=sys.stderr)
+    return response
+
+
+if __name__ == "__main__":
+    # Summarise an archive: python response_archive.py <dir>
+    if len(sys.argv) < 2:
+        print(json.dumps({"error": "Usage: python response_archive.py <archive_dir>", "success": False}))
+        sys.exit(1)
+    index = load_index(sys.argv[1])
+    entries = [e for group in index.values() for e in group]
+    blobs = {e["body"] for e in entries}
+    print(json.dumps({
+        "success": True,
+        "requests": len(entries),
+        "unique_requests": len(index),
+        "unique_bodies": len(blobs),
+        "backends": sorted({e["backend"] for e in entries})
+    }, indent=2))
@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+Stale-while-revalidate cache for scrape_user_tweets, stored in the shared
+tweet_cache directory
+Within the soft TTL the last good result is returned as is; between the
+soft and hard TTL it is still returned while a refresh runs in a
+detached process
+"""
+
+import functools
+import importlib
+import inspect
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+
+import response_archive
+import tweet_cache
+
+SOFT_TTL = int(os.getenv('TWEET_CACHE_SOFT_TTL', 15 * 60))
+HARD_TTL = int(os.getenv('TWEET_CACHE_HARD_TTL', 24 * 60 * 60))
+# Another process that started a refresh less than this long ago owns it
+REFRESH_LEASE = 120
+# Total time budget of a background refresh, for scrapers that take a deadline
+REFRESH_DEADLINE = int(os.getenv('TWEET_CACHE_REFRESH_DEADLINE', 60))
+
+# Fields a borrowed tweet needs so engagement metrics survive downstream
+TWEET_FIELDS = {"id", "text", "created_at", "retweet_count", "like_count", "reply_count", "url"}
+
+_refresh_lock = threading.Lock()
+
+
+def cache_key(source, username, max_tweets):
+    username = username.replace('@', '').lower()
+    return f"{source}:{username}:{max_tweets}"
+
+def load_entry(source, username, max_tweets):
+    """
+    Cached entry ({"stored_at", "result", ...}) from the shared cache or None
+    """
+    return tweet_cache.load(source, username, {"max_tweets": max_tweets})
+
+def store_result(source, username, max_tweets, result, soft_ttl=SOFT_TTL, hard_ttl=HARD_TTL):
+    # Only complete results count as the last good one
+    if result.get("success") and not result.get("partial"):
+        tweet_cache.store(source, username, {"max_tweets": max_tweets}, result, soft_ttl, hard_ttl)
+
+def complete_tweets(tweets):
+    """
+    Whether every tweet carries the fields the scrapers produce; the
+    tweets_route entries written by Next.js only hold id/text/dates
+    """
+    return all(isinstance(t, dict) and TWEET_FIELDS <= t.keys() for t in tweets)
+
+def borrow_entry(username, max_tweets, soft_ttl):
+    """
+    A fresh entry stored by another source or by the Next.js routes that
+    already holds at least max_tweets complete tweets, trimmed to max_tweets
+    """
+    now = time.time()
+    for entry in sorted(tweet_cache.entries_for(username), key=lambda e: -e["stored_at"]):
+        result = entry.get("result", {})
+        tweets = result.get("tweets", [])
+        if (now - entry["stored_at"] < soft_ttl and result.get("success") and len(tweets) >= max_tweets
+                and complete_tweets(tweets[:max_tweets])):
+            result = dict(result, tweets=tweets[:max_tweets], count=max_tweets)
+            return dict(entry, result=result)
+    return None
+
+def annotate(result, cached, age_seconds):
+    result = dict(result)
+    result["cached"] = cached
+    result["age_seconds"] = round(age_seconds, 1)
+    return result
+
+
+def refresh(source, fetch, username, max_tweets, kwargs, soft_ttl=SOFT_TTL, hard_ttl=HARD_TTL):
+    """
+    Re-run the scrape and store it with the caller's TTLs; failures keep the old entry
+    """
+    key = cache_key(source, username, max_tweets)
+    try:
+        print(f"🔄 Background refresh for {key}", file=sys.stderr)
+        store_result(source, username, max_tweets, fetch(username, max_tweets, **kwargs), soft_ttl, hard_ttl)
+    except Exception as e:
+        print(f"❌ Background refresh failed for {key}: {str(e)}", file=sys.stderr)
+
+def fetch_target(fetch):
+    """
+    (module, function) the refresh process imports fetch from
+    """
+    module = fetch.__module__
+    if module == '__main__':
+        module = os.path.splitext(os.path.basename(sys.modules['__main__'].__file__))[0]
+    return module, fetch.__name__
+
+def start_refresh(key, source, fetch, username, max_tweets, kwargs, soft_ttl, hard_ttl):
+    """
+    Start one background refresh per key across threads and processes
+    The refresh runs in a detached process, so a one-shot CLI run exits as
+    soon as it has printed the stale result and the refresh still completes
+    """
+    now = time.time()
+    with _refresh_lock:
+        # Re-read the entry: another thread or process may hold the lease by now
+        entry = load_entry(source, username, max_tweets)
+        if not entry or now - entry.get("refresh_started", 0) < REFRESH_LEASE:
+            return
+        tweet_cache.save_entry(dict(entry, refresh_started=now))
+    # The caller's deadline is for its own response; the refresh gets its own bound
+    kwargs = {k: v for k, v in kwargs.items() if k != 'deadline'}
+    if 'deadline' in inspect.signature(fetch).parameters:
+        kwargs['deadline'] = REFRESH_DEADLINE
+    module, function = fetch_target(fetch)
+    job = {"module": module, "function": function, "source": source, "username": username,
+           "max_tweets": max_tweets, "kwargs": kwargs, "soft_ttl": soft_ttl, "hard_ttl": hard_ttl}
+    try:
+        # No inherited pipes: a parent reading our stdout/stderr (e.g. the
+        # Next.js routes) would otherwise wait for the refresh to finish
+        subprocess.Popen([sys.executable, os.path.abspath(__file__), json.dumps(job)],
+                         stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                         env=dict(os.environ, TWEET_CACHE_DIR=tweet_cache.CACHE_DIR),
+                         start_new_session=True)
+    except Exception as e:
+        print(f"❌ Could not start background refresh for {key}: {str(e)}", file=sys.stderr)
+
+def run_refresh_job(job):
+    """
+    Body of the refresh process started by start_refresh
+    """
+    fetch = getattr(importlib.import_module(job["module"]), job["function"])
+    # The swr_cached wrapper would serve the stale entry again
+    fetch = getattr(fetch, '__wrapped__', fetch)
+    refresh(job["source"], fetch, job["username"], job["max_tweets"], job["kwargs"],
+            job["soft_ttl"], job["hard_ttl"])
+
+
+def cached_scrape(source, fetch, username, max_tweets, soft_ttl=SOFT_TTL, hard_ttl=HARD_TTL, **kwargs):
+    """
+    Serve scrape results stale-while-revalidate
+    """
+    key = cache_key(source, username, max_tweets)
+    entry = load_entry(source, username, max_tweets)
+    if entry:
+        age = time.time() - entry["stored_at"]
+        if age < soft_ttl:
+            print(f"📦 Using cached result for {key} ({int(age)}s old)", file=sys.stderr)
+            return annotate(entry["result"], True, age)
+        if age < hard_ttl:
+            print(f"📦 Serving stale result for {key} ({int(age)}s old), refreshing", file=sys.stderr)
+            start_refresh(key, source, fetch, username, max_tweets, kwargs, soft_ttl, hard_ttl)
+            return annotate(entry["result"], True, age)
+
+    borrowed = borrow_entry(username, max_tweets, soft_ttl)
+    if borrowed:
+        age = time.time() - borrowed["stored_at"]
+        print(f"📦 Using {borrowed['source']} cached result for {key} ({int(age)}s old)", file=sys.stderr)
+        return annotate(borrowed["result"], True, age)
+
+    result = fetch(username, max_tweets, **kwargs)
+    store_result(source, username, max_tweets, result, soft_ttl, hard_ttl)
+    return annotate(result, False, 0)
+
+def swr_cached(source):
+    """
+    Decorate a scrape_user_tweets(username, max_tweets) entry point;
+    pass use_cache=False to bypass the cache (replayed runs always do, so
+    they neither serve nor overwrite live entries)
+    """
+    def decorator(fetch):
+        default_max_tweets = inspect.signature(fetch).parameters['max_tweets'].default
+
+        @functools.wraps(fetch)
+        def wrapper(username, max_tweets=default_max_tweets, use_cache=True, **kwargs):
+            if not use_cache or response_archive.replaying():
+                return fetch(username, max_tweets, **kwargs)
+            return cached_scrape(source, fetch, username, max_tweets, **kwargs)
+        return wrapper
+    return decorator
+
+
+if __name__ == "__main__":
+    # Background refresh: python result_cache.py <job json>
+    run_refresh_job(json.loads(sys.argv[1]))
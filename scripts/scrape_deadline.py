@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Deadline budget for a whole scrape
+Each stage gets whatever is left of the caller's total time limit
+"""
+
+import time
+
+REQUEST_TIMEOUT = 10
+# Below this a request is not worth starting
+MIN_REQUEST_SECONDS = 0.5
+
+
+class Deadline:
+    """
+    Absolute end time; Deadline(None) never expires
+    """
+
+    def __init__(self, seconds=None):
+        self.seconds = seconds
+        self.expires = time.monotonic() + seconds if seconds is not None else None
+
+    @classmethod
+    def coerce(cls, deadline):
+        """
+        Accept a Deadline, a number of seconds or None
+        """
+        if isinstance(deadline, Deadline):
+            return deadline
+        return cls(float(deadline) if deadline is not None else None)
+
+    def remaining(self):
+        if self.expires is None:
+            return float('inf')
+        return max(0.0, self.expires - time.monotonic())
+
+    def expired(self):
+        return self.remaining() <= 0
+
+    def can_fit(self, seconds):
+        return self.remaining() >= seconds
+
+    def timeout(self, default=REQUEST_TIMEOUT):
+        """
+        Per-request timeout: the usual one, capped by the remaining budget
+        """
+        return min(default, self.remaining())
+
+    def check(self, seconds=MIN_REQUEST_SECONDS):
+        """
+        Raise DeadlineExceeded unless a request of this size still fits
+        """
+        if not self.can_fit(seconds):
+            raise DeadlineExceeded(f"Deadline of {self.seconds}s exceeded")
+
+
+class DeadlineExceeded(Exception):
+    pass
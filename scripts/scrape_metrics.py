@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+Scrape metrics
+In-process counters and histograms for every scrape stage
+Exported as Prometheus text (worker mode) or a JSON summary (CLI mode)
+"""
+
+import os
+import threading
+import time
+from urllib.parse import urlparse
+
+import response_archive
+
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+PARSE_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5)
+COUNT_BUCKETS = (0, 1, 5, 10, 20, 50, 100, 200)
+
+HELP = {
+    "scrape_request_seconds": ("histogram", "HTTP request latency per backend and host"),
+    "scrape_requests_total": ("counter", "HTTP requests per backend, host and outcome"),
+    "scrape_response_bytes_total": ("counter", "Bytes downloaded per backend and host"),
+    "scrape_parse_seconds": ("histogram", "Time spent turning a response into tweets"),
+    "scrape_tweets_per_request": ("histogram", "Tweets extracted per backend call"),
+    "rate_limit_checks_total": ("counter", "Rate budget checks by result"),
+    "rate_limit_recorded_requests_total": ("counter", "Requests recorded against the rate budget"),
+    "scrape_inflight_waiters": ("gauge", "Requests waiting on an in-flight scrape per key"),
+    "scrape_coalesced_requests_total": ("counter", "Requests served by another request's in-flight scrape"),
+}
+
+_lock = threading.Lock()
+_counters = {}
+_histograms = {}
+
+
+def _key(name, labels):
+    return name, tuple(sorted(labels.items()))
+
+def inc(name, value=1, **labels):
+    """
+    Add to a counter
+    """
+    key = _key(name, labels)
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + value
+
+def set_gauge(name, value, **labels):
+    """
+    Set a gauge; gauges share storage with counters
+    """
+    key = _key(name, labels)
+    with _lock:
+        if value:
+            _counters[key] = value
+        else:
+            _counters.pop(key, None)
+
+def observe(name, value, buckets=LATENCY_BUCKETS, **labels):
+    """
+    Record one observation in a histogram
+    """
+    key = _key(name, labels)
+    with _lock:
+        hist = _histograms.get(key)
+        if hist is None:
+            hist = _histograms[key] = {"buckets": buckets, "counts": [0] * len(buckets), "sum": 0.0, "count": 0}
+        for i, bound in enumerate(hist["buckets"]):
+            if value <= bound:
+                hist["counts"][i] += 1
+        hist["sum"] += value
+        hist["count"] += 1
+
+def outcome_for(status_code):
+    if status_code == 429:
+        return "rate_limited"
+    return "success" if 200 <= status_code < 300 else "failure"
+
+def _counting(iter_content, backend, host):
+    """
+    Wrap a response's iter_content so body bytes are counted as they are read
+    """
+    def counted(*args, **kwargs):
+        for chunk in iter_content(*args, **kwargs):
+            inc("scrape_response_bytes_total", len(chunk), backend=backend, host=host)
+            yield chunk
+    return counted
+
+def timed_request(backend, send, url, method="GET", **kwargs):
+    """
+    Call send(url, **kwargs) (requests.get, session.post, ...; method names
+    it for the response archive) and record
+    latency, outcome and bytes for the backend and host; the response
+    may be recorded or replayed by response_archive
+    With stream=True latency is time to headers and bytes are counted as
+    the body is consumed, so a reader that stops early is not charged for
+    the rest
+    """
+    host = urlparse(url).hostname or "unknown"
+    start = time.perf_counter()
+    try:
+        response = response_archive.send(backend, method, send, url, **kwargs)
+    except Exception:
+        observe("scrape_request_seconds", time.perf_counter() - start, backend=backend, host=host)
+        inc("scrape_requests_total", backend=backend, host=host, outcome="error")
+        raise
+    observe("scrape_request_seconds", time.perf_counter() - start, backend=backend, host=host)
+    inc("scrape_requests_total", backend=backend, host=host, outcome=outcome_for(response.status_code))
+    if kwargs.get('stream'):
+        # .content, .json() and stream_json all read through iter_content
+        response.iter_content = _counting(response.iter_content, backend, host)
+    else:
+        inc("scrape_response_bytes_total", len(response.content or b""), backend=backend, host=host)
+    return response
+
+def record_parse(backend, seconds):
+    observe("scrape_parse_seconds", seconds, PARSE_BUCKETS, backend=backend)
+
+def record_tweets(backend, count):
+    observe("scrape_tweets_per_request", count, COUNT_BUCKETS, backend=backend)
+
+def reset():
+    with _lock:
+        _counters.clear()
+        _histograms.clear()
+
+
+def _format_labels(labels, extra=None):
+    items = list(labels) + (extra or [])
+    if not items:
+        return ""
+    escaped = [(k, str(v).replace('\\', '\\\\').replace('"', '\\"')) for k, v in items]
+    return "{" + ",".join(f'{k}="{v}"' for k, v in escaped) + "}"
+
+def render_prometheus():
+    """
+    All metrics in the Prometheus text exposition format
+    """
+    with _lock:
+        counters = dict(_counters)
+        histograms = {k: dict(v, counts=list(v["counts"])) for k, v in _histograms.items()}
+
+    lines = []
+    names = sorted({name for name, _ in counters} | {name for name, _ in histograms})
+    for name in names:
+        kind, help_text = HELP.get(name, ("untyped", name))
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        for (n, labels), value in sorted(counters.items()):
+            if n == name:
+                lines.append(f"{name}{_format_labels(labels)} {value}")
+        for (n, labels), hist in sorted(histograms.items()):
+            if n != name:
+                continue
+            for bound, count in zip(hist["buckets"], hist["counts"]):
+                lines.append(f"{name}_bucket{_format_labels(labels, [('le', bound)])} {count}")
+            lines.append(f"{name}_bucket{_format_labels(labels, [('le', '+Inf')])} {hist['count']}")
+            lines.append(f"{name}_sum{_format_labels(labels)} {hist['sum']}")
+            lines.append(f"{name}_count{_format_labels(labels)} {hist['count']}")
+    return "\n".join(lines) + "\n"
+
+def write_prometheus(path):
+    """
+    Atomically write the text format for node_exporter's textfile collector
+    """
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w') as f:
+        f.write(render_prometheus())
+    os.replace(tmp_path, path)
+
+def summary():
+    """
+    Compact JSON-friendly view: counter totals and histogram count/sum/mean
+    """
+    with _lock:
+        counters = dict(_counters)
+        histograms = {k: dict(v) for k, v in _histograms.items()}
+
+    result = {}
+    for (name, labels), value in sorted(counters.items()):
+        label = ",".join(f"{k}={v}" for k, v in labels) or "all"
+        result.setdefault(name, {})[label] = value
+    for (name, labels), hist in sorted(histograms.items()):
+        label = ",".join(f"{k}={v}" for k, v in labels) or "all"
+        result.setdefault(name, {})[label] = {
+            "count": hist["count"],
+            "sum": round(hist["sum"], 6),
+            "mean": round(hist["sum"] / hist["count"], 6) if hist["count"] else 0
+        }
+    return result
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Scrape profiler
+On-demand cProfile + tracemalloc capture for a scrape run
+Scrapers mark stage boundaries (fetch, parse, normalize, serialize) so
+time and memory can be attributed to a stage and backend
+"""
+
+import cProfile
+import io
+import json
+import os
+import pstats
+import re
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+
+PROFILE_DIR = "profiles"
+TOP_ALLOCATIONS = 15
+TOP_FUNCTIONS = 30
+
+# Only one profile session per process; stage() is a no-op without one
+_session = None
+_session_lock = threading.Lock()
+
+
+def stage(name, detail=None):
+    """
+    Mark the start of a stage; the previous stage ends here
+    """
+    # cProfile only sees the thread that started it; ignore marks from others
+    if _session is None or _session.thread_id != threading.get_ident():
+        return
+    _session.mark(f"{name}[{detail}]" if detail else name)
+
+
+class ProfileSession:
+    def __init__(self, label):
+        self.label = label
+        self.stages = {}
+        self.current = None
+        self.started = None
+        self.start_memory = 0
+        self.peak_memory = 0
+        self.thread_id = threading.get_ident()
+        self.profiler = cProfile.Profile()
+
+    def start(self):
+        self.was_tracing = tracemalloc.is_tracing()
+        if not self.was_tracing:
+            tracemalloc.start(10)
+        tracemalloc.reset_peak()
+        self.run_started = time.perf_counter()
+        self.profiler.enable()
+
+    def mark(self, name):
+        now = time.perf_counter()
+        current_memory, peak_memory = tracemalloc.get_traced_memory()
+        # Peaks are reset per stage, so the run's peak is the max over stages
+        self.peak_memory = max(self.peak_memory, peak_memory)
+        if self.current is not None:
+            entry = self.stages.setdefault(self.current, {
+                "calls": 0, "seconds": 0.0, "peak_bytes": 0, "allocated_bytes": 0
+            })
+            entry["calls"] += 1
+            entry["seconds"] += now - self.started
+            entry["peak_bytes"] = max(entry["peak_bytes"], peak_memory - self.start_memory)
+            entry["allocated_bytes"] += current_memory - self.start_memory
+        tracemalloc.reset_peak()
+        self.current = name
+        self.started = now
+        self.start_memory = current_memory
+
+    def stop(self):
+        self.mark(None)
+        self.profiler.disable()
+        elapsed = time.perf_counter() - self.run_started
+        snapshot = tracemalloc.take_snapshot()
+        if not self.was_tracing:
+            tracemalloc.stop()
+        return elapsed, snapshot, self.peak_memory
+
+    def report(self, elapsed, snapshot, peak):
+        snapshot = snapshot.filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, cProfile.__file__),
+        ))
+        top_allocations = [
+            {
+                "location": f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}",
+                "size_bytes": stat.size,
+                "count": stat.count
+            }
+            for stat in snapshot.statistics('lineno')[:TOP_ALLOCATIONS]
+        ]
+
+        stream = io.StringIO()
+        stats = pstats.Stats(self.profiler, stream=stream)
+        stats.sort_stats('cumulative').print_stats(TOP_FUNCTIONS)
+
+        return {
+            "label": self.label,
+            "created_at": datetime.now().isoformat(),
+            "elapsed_seconds": round(elapsed, 6),
+            "stages": {
+                name: dict(entry, seconds=round(entry["seconds"], 6))
+                for name, entry in self.stages.items()
+            },
+            "memory": {
+                "peak_bytes": peak,
+                "top_allocations": top_allocations
+            },
+            "cprofile": stream.getvalue()
+        }
+
+
+def default_profile_path(label):
+    safe_label = re.sub(r'[^A-Za-z0-9_.-]+', '_', label)
+    return os.path.join(PROFILE_DIR, f"{safe_label}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+
+@contextmanager
+def profiled(label, path=None):
+    """
+    Profile the enclosed block and write a JSON report to path
+    (plus path.prof with raw pstats for diffing); yields the report path,
+    or None when another session is already running in this process
+    tracemalloc figures cover every thread, so callers that run work
+    concurrently should keep it out of a profiled block (see scrape_server)
+    """
+    global _session
+    session = ProfileSession(label)
+    with _session_lock:
+        if _session is not None:
+            # Nested or concurrent run: the first session owns the profiler
+            print(f"⚠️ Profile for {label} skipped, another profile is running", file=sys.stderr)
+            session = None
+        else:
+            _session = session
+    if session is None:
+        yield None
+        return
+
+    path = path if isinstance(path, str) else default_profile_path(label)
+    session.start()
+    try:
+        yield path
+    finally:
+        _session = None
+        elapsed, snapshot, peak = session.stop()
+        try:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            session.profiler.dump_stats(f"{path}.prof")
+            with open(path, 'w') as f:
+                json.dump(session.report(elapsed, snapshot, peak), f, indent=2)
+            print(f"🔬 Profile written to {path}", file=sys.stderr)
+        except Exception as e:
+            print(f"❌ Could not write profile: {str(e)}", file=sys.stderr)
+
+@contextmanager
+def maybe_profiled(enabled, label, path=None):
+    """
+    profiled() when enabled, otherwise a plain block
+    """
+    if enabled:
+        with profiled(label, path) as report_path:
+            yield report_path
+    else:
+        yield None
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Scrape Server
+Long-running HTTP worker in front of the scrapers
+GET /tweets?username=<name>&max_tweets=<n>&backend=<real|api|simple|generator>[&deadline=<s>][&profile=1]
+GET /metrics for Prometheus
+Profiled requests run one at a time with no other scrape in flight
+"""
+
+import importlib
+import inspect
+import json
+import sys
+import threading
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+from cli_options import parse_args
+from crawl_worker import SCRAPERS
+from scrape_deadline import Deadline
+from scrape_metrics import render_prometheus
+from scrape_profiler import maybe_profiled
+from single_flight import SingleFlight
+
+DEFAULT_PORT = 8765
+
+flights = SingleFlight()
+
+
+class ProfileGate:
+    """
+    Lets plain requests run together but gives a profiled request the
+    process to itself: cProfile and tracemalloc see every thread, and
+    scrape_profiler holds one session at a time
+    Waiting profiled requests go first so they are not starved
+    """
+
+    def __init__(self):
+        self.cond = threading.Condition()
+        self.active = 0
+        self.profiling = False
+        self.waiting = 0
+
+    @contextmanager
+    def enter(self, exclusive):
+        with self.cond:
+            if exclusive:
+                self.waiting += 1
+                self.cond.wait_for(lambda: not self.profiling and self.active == 0)
+                self.waiting -= 1
+                self.profiling = True
+            else:
+                self.cond.wait_for(lambda: not self.profiling and self.waiting == 0)
+                self.active += 1
+        try:
+            yield
+        finally:
+            with self.cond:
+                if exclusive:
+                    self.profiling = False
+                else:
+                    self.active -= 1
+                self.cond.notify_all()
+
+gate = ProfileGate()
+
+
+def scrape(backend, username, max_tweets, deadline=None):
+    """
+    Coalesced scrape_user_tweets call for one backend, bounded by deadline
+    """
+    scrape_user_tweets = importlib.import_module(SCRAPERS[backend]).scrape_user_tweets
+    deadline = Deadline.coerce(deadline)
+    fetch, expires = scrape_user_tweets, None
+    if 'deadline' in inspect.signature(scrape_user_tweets).parameters:
+        def fetch(username, max_tweets):
+            return scrape_user_tweets(username, max_tweets, deadline=deadline)
+        expires = deadline.expires
+    timeout = None if deadline.expires is None else deadline.remaining()
+    try:
+        # The leader's fetch stops at its own deadline, so only requests
+        # with an equal or tighter one may share it
+        return flights.do(backend, username, max_tweets, fetch, timeout, expires)
+    except TimeoutError as e:
+        return {
+            "success": False,
+            "error": str(e),
+            "tweets": [],
+            "username": username.replace('@', '').lower(),
+            "source": "deadline_exceeded",
+            "partial": True
+        }
+
+
+class ScrapeHandler(BaseHTTPRequestHandler):
+    def _send(self, status, body, content_type="application/json"):
+        data = body.encode('utf-8')
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+
+        if url.path == "/metrics":
+            self._send(200, render_prometheus(), "text/plain; version=0.0.4")
+            return
+
+        if url.path != "/tweets":
+            self._send(404, json.dumps({"success": False, "error": "Not found"}))
+            return
+
+        username = query.get("username", "")
+        backend = query.get("backend", "real")
+        if not username or backend not in SCRAPERS:
+            self._send(400, json.dumps({
+                "success": False,
+                "error": "username is required and backend must be one of " + ", ".join(SCRAPERS)
+            }))
+            return
+
+        try:
+            max_tweets = int(query.get("max_tweets", 50))
+            profile = query.get("profile") == "1"
+            with gate.enter(profile), maybe_profiled(profile, f"server_{backend}_{username}"):
+                result = scrape(backend, username, max_tweets, query.get("deadline"))
+            self._send(200, json.dumps(result, ensure_ascii=True))
+        except Exception as e:
+            print(f"❌ Request failed: {str(e)}", file=sys.stderr)
+            self._send(500, json.dumps({"success": False, "error": str(e), "tweets": []}))
+
+    def log_message(self, format, *args):
+        print(f"🌐 {self.address_string()} {format % args}", file=sys.stderr)
+
+
+def main():
+    args, flags = parse_args(sys.argv[1:])
+    port = int(args[0]) if args else DEFAULT_PORT
+    host = flags.get('host', '127.0.0.1')
+    server = ThreadingHTTPServer((host, port), ScrapeHandler)
+    print(f"🚀 Scrape server listening on {host}:{port}", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+if __name__ == "__main__":
+    main()
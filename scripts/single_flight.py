@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Single-flight request coalescing
+Concurrent scrapes of the same user and backend share one in-flight fetch;
+an outstanding request for more tweets, and with at least as much time
+left, also satisfies smaller ones
+"""
+
+import threading
+
+from scrape_metrics import inc, set_gauge
+
+
+class Flight:
+    def __init__(self, max_tweets, expires=None):
+        self.max_tweets = max_tweets
+        # Monotonic time the leader's fetch gives up at, None for no limit
+        self.expires = expires
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+def covers(flight_expires, expires):
+    """
+    Whether a fetch bounded by flight_expires runs at least as long as a
+    caller bounded by expires needs (None means no limit)
+    """
+    if flight_expires is None:
+        return True
+    return expires is not None and flight_expires >= expires
+
+def trim_result(result, max_tweets):
+    """
+    Cut a shared result down to what the caller asked for
+    """
+    if len(result.get("tweets", [])) <= max_tweets:
+        return result
+    result = dict(result)
+    result["tweets"] = result["tweets"][:max_tweets]
+    result["count"] = len(result["tweets"])
+    return result
+
+
+class SingleFlight:
+    def __init__(self):
+        self.lock = threading.Lock()
+        # (backend, username) -> list of in-flight Flights
+        self.flights = {}
+
+    def _join(self, key, max_tweets, expires):
+        """
+        Existing flight big enough and with a deadline at least as generous
+        as this request's, or a new one we lead
+        """
+        with self.lock:
+            for flight in self.flights.get(key, []):
+                if flight.max_tweets >= max_tweets and covers(flight.expires, expires):
+                    flight.waiters += 1
+                    self._publish(key)
+                    return flight, False
+            flight = Flight(max_tweets, expires)
+            self.flights.setdefault(key, []).append(flight)
+            return flight, True
+
+    def _leave(self, key, flight):
+        with self.lock:
+            flight.waiters -= 1
+            self._publish(key)
+
+    def _land(self, key, flight):
+        with self.lock:
+            flights = self.flights.get(key, [])
+            if flight in flights:
+                flights.remove(flight)
+            if not flights:
+                self.flights.pop(key, None)
+
+    def _publish(self, key):
+        backend, username = key
+        waiters = sum(f.waiters for f in self.flights.get(key, []))
+        set_gauge("scrape_inflight_waiters", waiters, backend=backend, username=username)
+
+    def do(self, backend, username, max_tweets, fetch, timeout=None, expires=None):
+        """
+        Run fetch(username, max_tweets) unless an equal or larger scrape of
+        the same user and backend is already running, then share its result
+        expires is the monotonic time fetch is bounded by (None if unbounded);
+        a request never joins a flight that would give up before it does
+        A waiter gives up with TimeoutError after timeout seconds
+        """
+        username = username.replace('@', '').lower()
+        key = (backend, username)
+        flight, leader = self._join(key, max_tweets, expires)
+
+        if not leader:
+            inc("scrape_coalesced_requests_total", backend=backend)
+            try:
+                finished = flight.done.wait(timeout)
+            finally:
+                self._leave(key, flight)
+            if not finished:
+                raise TimeoutError(f"In-flight scrape of @{username} did not finish in time")
+            if flight.error is not None:
+                raise flight.error
+            return trim_result(flight.result, max_tweets)
+
+        try:
+            flight.result = fetch(username, max_tweets)
+            return flight.result
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            self._land(key, flight)
+            flight.done.set()
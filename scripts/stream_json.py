@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+Streaming JSON extraction
+Walks a JSON body chunk by chunk to one array of items and decodes them
+one at a time, keeping only the requested fields; everything around the
+items is skipped without being turned into Python objects, and iteration
+can stop after the items needed
+"""
+
+import codecs
+import json
+import re
+
+# Path step matching every element of an array
+EACH = object()
+
+CHUNK_SIZE = 64 * 1024
+# Drop consumed text from the buffer once this much has piled up
+COMPACT_AT = 256 * 1024
+
+_STRING = re.compile(r'"(?:[^"\\]|\\.)*"', re.DOTALL)
+_SCALAR = re.compile(r'-?[0-9][0-9.eE+-]*|true|false|null')
+# Everything up to the next bracket outside a string, in one match; strings
+# are consumed whole so brackets inside them are ignored
+_SKIP_RUN = re.compile(r'(?:[^"\[\]{}]+|"(?:[^"\\]|\\.)*")*', re.DOTALL)
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+
+_decoder = json.JSONDecoder()
+
+
+class _Reader:
+    def __init__(self, chunks):
+        self.chunks = iter(chunks)
+        self.utf8 = codecs.getincrementaldecoder('utf-8')(errors='replace')
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self):
+        """
+        Append the next chunk; False once the body is exhausted
+        """
+        if self.eof:
+            return False
+        if self.pos > COMPACT_AT:
+            self.buf = self.buf[self.pos:]
+            self.pos = 0
+        for chunk in self.chunks:
+            text = self.utf8.decode(chunk) if isinstance(chunk, bytes) else chunk
+            if text:
+                self.buf += text
+                return True
+        self.buf += self.utf8.decode(b'', final=True)
+        self.eof = True
+        return False
+
+    def peek(self):
+        """
+        Next non-whitespace character ('' at the end of the body)
+        """
+        while True:
+            self.pos = _WHITESPACE.match(self.buf, self.pos).end()
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._fill():
+                return ''
+
+    def _match(self, pattern):
+        # A match running into the end of the buffer may continue in the next chunk
+        while True:
+            match = pattern.match(self.buf, self.pos)
+            if match and (match.end() < len(self.buf) or self.eof):
+                return match
+            if not self._fill():
+                match = pattern.match(self.buf, self.pos)
+                if not match:
+                    raise ValueError(f"Invalid JSON at offset {self.pos}")
+                return match
+
+    def read_string(self):
+        self.peek()
+        match = self._match(_STRING)
+        self.pos = match.end()
+        return json.loads(match.group())
+
+    def expect(self, char):
+        if self.peek() != char:
+            raise ValueError(f"Expected {char!r} at offset {self.pos}")
+        self.pos += 1
+
+    def read_value(self):
+        """
+        Decode the next value in full
+        """
+        char = self.peek()
+        if char == '-' or char.isdigit():
+            # A number may continue in the next chunk, so take the whole token first
+            match = self._match(_SCALAR)
+            self.pos = match.end()
+            return json.loads(match.group())
+        while True:
+            # Strings, literals and containers only decode once complete
+            try:
+                value, self.pos = _decoder.raw_decode(self.buf, self.pos)
+                return value
+            except json.JSONDecodeError:
+                if not self._fill():
+                    raise
+
+    def skip_value(self):
+        """
+        Move past the next value without decoding it
+        """
+        char = self.peek()
+        if char == '"':
+            self.pos = self._match(_STRING).end()
+        elif char in '[{':
+            depth = 0
+            while True:
+                self.pos = _SKIP_RUN.match(self.buf, self.pos).end()
+                if self.pos >= len(self.buf) or self.buf[self.pos] == '"':
+                    # End of buffer, or a string that continues in the next chunk
+                    if not self._fill():
+                        raise ValueError("Unexpected end of JSON")
+                    continue
+                token = self.buf[self.pos]
+                self.pos += 1
+                if token in '[{':
+                    depth += 1
+                else:
+                    depth -= 1
+                    if depth == 0:
+                        return
+        else:
+            self.pos = self._match(_SCALAR).end()
+
+    def read_fields(self, fields):
+        """
+        Dict of just the wanted keys of the next object (None if not an object)
+        """
+        if self.peek() != '{':
+            self.skip_value()
+            return None
+        # Decoding one item in C and dropping the rest beats skipping its
+        # keys one by one in Python; only a single item is ever held in full
+        item = self.read_value()
+        return {key: value for key, value in item.items() if key in fields}
+
+    def walk(self, path, fields):
+        if not path:
+            if fields is None:
+                yield self.read_value()
+            else:
+                item = self.read_fields(fields)
+                if item is not None:
+                    yield item
+            return
+
+        step, rest = path[0], path[1:]
+        char = self.peek()
+        if step is EACH:
+            if char != '[':
+                self.skip_value()
+                return
+            self.pos += 1
+            while self.peek() != ']':
+                yield from self.walk(rest, fields)
+                if self.peek() == ',':
+                    self.pos += 1
+            self.pos += 1
+        else:
+            if char != '{':
+                self.skip_value()
+                return
+            self.pos += 1
+            while self.peek() != '}':
+                key = self.read_string()
+                self.expect(':')
+                if key == step:
+                    yield from self.walk(rest, fields)
+                else:
+                    self.skip_value()
+                if self.peek() == ',':
+                    self.pos += 1
+            self.pos += 1
+
+
+def iter_items(chunks, path, fields=None):
+    """
+    Yield the values at path (keys and EACH steps) from an iterable of
+    bytes/str chunks, holding only the given fields when fields is set
+    e.g. iter_items(chunks, ("data", EACH), {"id", "text"})
+    """
+    return _Reader(chunks).walk(tuple(path), set(fields) if fields is not None else None)
+
+def iter_response_items(response, path, fields=None, chunk_size=CHUNK_SIZE):
+    """
+    iter_items over a requests.Response body; for a stream=True request
+    the body is read from the connection as it is parsed, and the response
+    is closed once iteration ends or is abandoned (e.g. after max_tweets)
+    """
+    def chunks():
+        try:
+            yield from response.iter_content(chunk_size)
+        finally:
+            response.close()
+    return iter_items(chunks(), path, fields)
@@ -0,0 +1,105 @@
+import pytest
+
+import crawl_queue
+from crawl_queue import SQLiteWorkQueue, WorkQueue, open_queue, shard_for
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def time(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(crawl_queue.time, 'time', clock.time)
+    return clock
+
+@pytest.fixture
+def queue(tmp_path, clock):
+    return SQLiteWorkQueue(str(tmp_path / "queue.db"), num_shards=1, lease_seconds=60)
+
+
+def test_work_queue_is_abstract():
+    with pytest.raises(TypeError):
+        WorkQueue()
+
+
+def test_claim_leases_pending_users_once(queue):
+    assert queue.claim("a") is None
+    queue.enqueue(["@Bob", "alice"], {"max_tweets": 5})
+
+    lease = queue.claim("a")
+
+    assert lease["usernames"] == ["alice", "bob"]
+    assert lease["options"] == {"alice": {"max_tweets": 5}, "bob": {"max_tweets": 5}}
+    assert queue.claim("b") is None
+    assert queue.stats()["leased"] == 1
+
+
+def test_heartbeat_extends_the_lease(queue, clock):
+    queue.enqueue(["bob"])
+    lease = queue.claim("a")
+
+    clock.now += 50
+    assert queue.heartbeat("a", lease["lease_id"]) is True
+    clock.now += 50
+    assert queue.requeue_stalled() == 0
+    assert queue.claim("b") is None
+
+
+def test_expired_lease_is_reclaimed_and_old_holder_loses_it(queue, clock):
+    queue.enqueue(["bob", "carol"])
+    lease = queue.claim("a")
+    queue.mark_done(lease["lease_id"], "bob")
+
+    clock.now += 61
+    taken = queue.claim("b")
+
+    assert taken["shard_id"] == lease["shard_id"]
+    assert taken["usernames"] == ["carol"]
+    assert queue.heartbeat("a", lease["lease_id"]) is False
+
+
+def test_stalled_lease_is_requeued(queue, clock):
+    queue.enqueue(["bob"])
+    queue.claim("a")
+
+    clock.now += 61
+    assert queue.requeue_stalled() == 1
+    assert queue.stats()["pending"] == 1
+    assert queue.claim("b")["usernames"] == ["bob"]
+
+
+def test_complete_reopens_a_shard_that_got_new_users(queue):
+    queue.enqueue(["bob"])
+    lease = queue.claim("a")
+    queue.mark_done(lease["lease_id"], "bob")
+    queue.enqueue(["dave"])
+
+    queue.complete(lease["lease_id"])
+
+    assert queue.stats()["pending"] == 1
+    assert queue.claim("b")["usernames"] == ["dave"]
+
+
+def test_complete_finishes_a_drained_shard(queue):
+    queue.enqueue(["bob"])
+    lease = queue.claim("a")
+    queue.mark_done(lease["lease_id"], "bob")
+
+    queue.complete(lease["lease_id"])
+
+    stats = queue.stats()
+    assert (stats["done"], stats["users_done"]) == (1, 1)
+    assert queue.claim("b") is None
+
+
+def test_shards_and_queue_urls(tmp_path):
+    assert shard_for("@Bob", 64) == shard_for("bob", 64)
+    assert isinstance(open_queue(f"sqlite://{tmp_path / 'q.db'}"), SQLiteWorkQueue)
+    with pytest.raises(ValueError):
+        open_queue("redis://localhost")
@@ -0,0 +1,73 @@
+import time
+
+import requests
+
+from credential_pool import CredentialPool, USER_LOOKUP_ENDPOINT, USER_TWEETS_ENDPOINT, endpoint_for
+
+
+def response(status, url, **headers):
+    r = requests.models.Response()
+    r.status_code = status
+    r.url = url
+    r.headers.update(headers)
+    return r
+
+
+def test_endpoint_for_collapses_ids_and_usernames():
+    assert endpoint_for("https://api.twitter.com/2/users/by/username/bob") == USER_LOOKUP_ENDPOINT
+    assert endpoint_for("https://api.twitter.com/2/users/12345/tweets?max_results=10") == USER_TWEETS_ENDPOINT
+
+
+def test_budgets_are_tracked_per_endpoint(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    pool = CredentialPool(["a", "b"], str(tmp_path / "state.json"))
+    reset = str(int(time.time()) + 600)
+
+    pool.update("a", response(429, "https://api.twitter.com/2/users/by/username/bob", **{"x-rate-limit-reset": reset}))
+    pool.update("b", response(200, "https://api.twitter.com/2/users/by/username/bob", **{
+        "x-rate-limit-remaining": "3", "x-rate-limit-limit": "300", "x-rate-limit-reset": reset}))
+    pool.update("b", response(200, "https://api.twitter.com/2/users/9/tweets", **{
+        "x-rate-limit-remaining": "1400", "x-rate-limit-limit": "1500", "x-rate-limit-reset": reset}))
+
+    assert pool.headroom("a", endpoint=USER_LOOKUP_ENDPOINT) == 0
+    assert pool.headroom("a", endpoint=USER_TWEETS_ENDPOINT) > 0
+    assert pool.headroom("b", endpoint=USER_TWEETS_ENDPOINT) == 1400
+    assert pool.acquire(USER_LOOKUP_ENDPOINT) == "b"
+    # Reloaded from the state file by another run
+    reloaded = CredentialPool(["a", "b"], str(tmp_path / "state.json"))
+    assert reloaded.headroom("b", endpoint=USER_LOOKUP_ENDPOINT) == 3
+    assert reloaded.headroom("b") == 3
+
+
+def test_state_is_replaced_atomically(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "state").mkdir()
+    state_file = tmp_path / "state" / "state.json"
+    pool = CredentialPool(["a"], str(state_file))
+    pool.update("a", response(200, "https://api.twitter.com/2/users/9/tweets", **{"x-rate-limit-remaining": "7"}))
+    first_inode = state_file.stat().st_ino
+
+    pool.update("a", response(200, "https://api.twitter.com/2/users/9/tweets", **{"x-rate-limit-remaining": "6"}))
+
+    assert state_file.stat().st_ino != first_inode
+    assert [p.name for p in state_file.parent.iterdir()] == ["state.json"]
+    assert CredentialPool(["a"], str(state_file)).state == pool.state
+
+
+def test_simple_scraper_reports_an_exhausted_pool_without_waiting(tmp_path, monkeypatch):
+    import twitter_api_simple
+
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv('TWITTER_BEARER_TOKENS', "a,b")
+    monkeypatch.setattr(time, 'sleep', lambda seconds: (_ for _ in ()).throw(AssertionError(f"slept {seconds}s")))
+    sent = []
+
+    def fake_get(url, headers=None, **kwargs):
+        sent.append(headers["Authorization"])
+        return response(429, url, **{"x-rate-limit-remaining": "0", "x-rate-limit-reset": str(int(time.time()) + 600)})
+    monkeypatch.setattr(requests, 'get', fake_get)
+
+    result = twitter_api_simple.scrape_user_tweets("bob", use_cache=False)
+
+    assert result["source"] == "rate_limit_prevented"
+    assert sorted(sent) == ["Bearer a", "Bearer b"]
@@ -0,0 +1,29 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from engagement_analytics import EngagementFrame
+
+
+def test_empty_frame_queries_return_empty():
+    frame = EngagementFrame.from_results([{"success": True, "username": "bob", "tweets": []}])
+
+    assert len(frame) == 0
+    assert frame.engagement_rate().dtype == np.float64
+    assert frame.engagement_rate_percentiles() == {}
+    assert frame.compare_users() == {}
+    assert frame.top_k() == []
+
+
+def test_compare_users_counts_tweets_as_ints():
+    frame = EngagementFrame()
+    frame.add_tweets("bob", [
+        {"id": "1", "text": "a", "like_count": 3, "created_at": "2024-01-01T00:00:00Z"},
+        {"id": "2", "text": "b", "like_count": 5, "created_at": "2024-01-03T00:00:00Z"},
+    ])
+
+    summary = frame.compare_users()["bob"]
+
+    assert summary["tweets"] == 2 and isinstance(summary["tweets"], int)
+    assert summary["engagement_mean"] == 4.0
+    assert frame.engagement_rate_percentiles()["bob"]["p50"] == 1.0
@@ -0,0 +1,97 @@
+import os
+import types
+
+import pytest
+import requests
+
+import real_tweet_scraper
+import scrape_deadline
+from scrape_deadline import Deadline
+
+FIXTURE = os.path.join(os.path.dirname(__file__), "fixtures", "syndication_timeline.json")
+
+
+class Backends:
+    """
+    Fake network on a fake clock: every request takes `latency` seconds
+    and records the timeout it was given and the budget left when it was sent
+    """
+
+    def __init__(self, monkeypatch, latency, responses=None):
+        self.now = 0.0
+        self.latency = latency
+        self.responses = responses or {}
+        self.sent = []
+        monkeypatch.setattr(scrape_deadline, 'time', types.SimpleNamespace(monotonic=lambda: self.now))
+        monkeypatch.setattr(requests, 'get', self.send)
+        monkeypatch.setattr(requests.Session, 'get', lambda session, url, **kwargs: self.send(url, **kwargs))
+        monkeypatch.setattr(requests.Session, 'post', lambda session, url, **kwargs: self.send(url, **kwargs))
+
+    def send(self, url, timeout=None, **kwargs):
+        host = requests.utils.urlparse(url).hostname
+        self.sent.append((host, timeout, self.deadline.remaining()))
+        self.now += min(self.latency, timeout)
+        if self.latency > timeout:
+            raise requests.exceptions.Timeout(f"{host} timed out")
+        response = requests.models.Response()
+        response.url = url
+        response.status_code, response._content = self.responses.get(host, (503, b"unavailable"))
+        response._content_consumed = True
+        return response
+
+    def scrape(self, seconds):
+        self.deadline = Deadline(seconds)
+        return real_tweet_scraper.scrape_user_tweets("bob", 5, deadline=self.deadline, use_cache=False)
+
+
+def test_each_request_gets_the_remaining_budget_as_timeout(monkeypatch):
+    backends = Backends(monkeypatch, latency=1.0)
+    backends.scrape(3.5)
+
+    assert backends.sent
+    for host, timeout, remaining in backends.sent:
+        assert timeout == pytest.approx(min(scrape_deadline.REQUEST_TIMEOUT, remaining))
+
+
+def test_running_out_of_time_in_the_nitter_loop_is_a_deadline_result(monkeypatch):
+    backends = Backends(monkeypatch, latency=1.0)
+    result = backends.scrape(3.5)
+
+    nitter_hosts = [host for host, _, _ in backends.sent if host.startswith("nitter")]
+    assert 0 < len(nitter_hosts) < 5
+    assert result["success"] is False
+    assert result["source"] == "deadline_exceeded"
+    assert result["partial"] is True
+    assert "nitter_scraping" in result["skipped"]
+
+
+def test_backends_that_cannot_fit_are_skipped(monkeypatch):
+    backends = Backends(monkeypatch, latency=0.8)
+    result = backends.scrape(1.5)
+
+    # Syndication leaves 0.7s, less than the guest token chain needs
+    assert [host for host, _, _ in backends.sent][:1] == ["syndication.twitter.com"]
+    assert "api.twitter.com" not in {host for host, _, _ in backends.sent}
+    assert result["source"] == "deadline_exceeded"
+    assert result["skipped"][0] == "guest_token"
+
+
+def test_tweets_arriving_after_the_deadline_are_flagged_partial(monkeypatch):
+    with open(FIXTURE, 'rb') as f:
+        body = f.read()
+    backends = Backends(monkeypatch, latency=2.0, responses={"syndication.twitter.com": (200, body)})
+    # The request gets the whole 2s budget and the deadline is spent when it returns
+    result = backends.scrape(2.0)
+
+    assert result["success"] is True
+    assert result["source"] == "syndication_api"
+    assert result["partial"] is True
+
+
+def test_no_deadline_means_a_plain_failure(monkeypatch):
+    backends = Backends(monkeypatch, latency=0.1)
+    result = backends.scrape(None)
+
+    assert len([host for host, _, _ in backends.sent if host.startswith("nitter")]) == 5
+    assert result["source"] == "failed"
+    assert "partial" not in result
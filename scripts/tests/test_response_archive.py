@@ -0,0 +1,109 @@
+import json
+import os
+import time
+
+import pytest
+import requests
+
+import credential_pool
+import response_archive
+import twitter_api_scraper
+import twitter_api_simple
+from credential_pool import DEFAULT_BEARER_TOKEN
+
+
+def write_archive(root, responses):
+    """
+    Archive with one recorded GET per (url, params, status, headers, body)
+    """
+    os.makedirs(root, exist_ok=True)
+    with open(os.path.join(root, "index.jsonl"), 'w') as f:
+        for url, params, status, headers, body in responses:
+            f.write(json.dumps({
+                "key": response_archive.request_key("get", url, params),
+                "backend": "twitter_api_v2",
+                "method": "GET",
+                "url": url,
+                "params": params,
+                "status": status,
+                "headers": headers,
+                "body": response_archive.store_body(root, body),
+                "elapsed": 0.5,
+                "recorded_at": "2026-01-01T00:00:00"
+            }) + "\n")
+
+
+@pytest.fixture
+def live_state(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.delenv('TWITTER_BEARER_TOKENS', raising=False)
+    monkeypatch.delenv('TWITTER_BEARER_TOKEN', raising=False)
+    state = {credential_pool.credential_id(DEFAULT_BEARER_TOKEN): {
+        "revoked_until": 0,
+        "endpoints": {credential_pool.USER_LOOKUP_ENDPOINT: {"remaining": 180, "limit": 300, "reset": time.time() + 600}}
+    }}
+    with open(credential_pool.STATE_FILE, 'w') as f:
+        json.dump(state, f)
+    yield tmp_path
+    response_archive.configure()
+
+
+def test_replayed_401_leaves_live_state_untouched(live_state):
+    url = "https://api.twitter.com/2/users/by/username/bob"
+    write_archive("arc", [(url, None, 401, {"content-type": "application/json"}, b'{"title": "Unauthorized"}')])
+    before = open(credential_pool.STATE_FILE, 'rb').read()
+    response_archive.configure("replay", "arc")
+
+    result = twitter_api_scraper.scrape_user_tweets("bob")
+
+    assert result["success"] is False
+    assert open(credential_pool.STATE_FILE, 'rb').read() == before
+    assert sorted(os.listdir(live_state)) == ["arc", credential_pool.STATE_FILE]
+
+
+def test_replayed_429_does_not_sleep_or_spend_budget(live_state, monkeypatch):
+    url = "https://api.twitter.com/2/users/by/username/bob"
+    headers = {"x-rate-limit-remaining": "0", "x-rate-limit-reset": str(int(time.time()) + 900)}
+    write_archive("arc", [(url, None, 429, headers, b'{"title": "Too Many Requests"}')])
+    before = open(credential_pool.STATE_FILE, 'rb').read()
+    response_archive.configure("replay", "arc")
+    monkeypatch.setattr(time, 'sleep', lambda seconds: pytest.fail(f"slept {seconds}s during replay"))
+
+    pool = credential_pool.CredentialPool()
+    response = twitter_api_simple.api_get(url, pool.acquire(), pool)
+
+    assert response.status_code == 429
+    assert pool.acquire() is None
+    assert open(credential_pool.STATE_FILE, 'rb').read() == before
+    assert credential_pool.CredentialPool().acquire() == DEFAULT_BEARER_TOKEN
+
+
+def test_recorded_scrape_replays_without_the_network(live_state, monkeypatch):
+    bodies = {
+        "https://api.twitter.com/2/users/by/username/bob": b'{"data": {"id": "42", "username": "bob"}}',
+        "https://api.twitter.com/2/users/42/tweets": json.dumps({"data": [
+            {"id": str(i), "text": f"tweet number {i}", "created_at": "2026-01-01T00:00:00.000Z",
+             "public_metrics": {"retweet_count": i, "like_count": 2 * i, "reply_count": 0, "quote_count": 0}}
+            for i in range(3)
+        ]}).encode('utf-8'),
+    }
+
+    def fake_get(url, **kwargs):
+        response = requests.models.Response()
+        response.status_code, response.url = 200, url
+        response._content, response._content_consumed = bodies[url], True
+        return response
+    # Wrapped senders must record under the same key the real one would
+    monkeypatch.setattr(requests, 'get', lambda url, **kwargs: fake_get(url, **kwargs))
+    response_archive.configure("record", "arc")
+    recorded = twitter_api_scraper.scrape_user_tweets("bob", 3, use_cache=False)
+    index = response_archive.load_index("arc")
+    assert {e["method"] for group in index.values() for e in group} == {"GET"}
+
+    monkeypatch.setattr(requests, 'get', lambda url, **kwargs: pytest.fail(f"network request to {url}"))
+    response_archive.configure("replay", "arc")
+    replayed = twitter_api_scraper.scrape_user_tweets("bob", 3, use_cache=False)
+
+    assert recorded["success"] is True and recorded["count"] == 3
+    strip = lambda result: [{k: v for k, v in t.items() if k != "date"} for t in result["tweets"]]
+    assert strip(replayed) == strip(recorded)
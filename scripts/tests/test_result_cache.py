@@ -0,0 +1,74 @@
+import json
+import os
+import subprocess
+import time
+
+import pytest
+
+import result_cache
+import tweet_cache
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(tweet_cache, 'CACHE_DIR', str(tmp_path / "tweet_cache"))
+    return tmp_path
+
+
+def fetch_fresh(username, max_tweets, deadline=None):
+    """
+    Scraper the refresh process imports from this module
+    """
+    return {"success": True, "tweets": [{"id": "fresh"}], "username": username, "deadline": deadline}
+
+
+def test_stale_hit_hands_the_refresh_to_a_detached_process(monkeypatch):
+    started = []
+    monkeypatch.setattr(subprocess, 'Popen', lambda args, **kwargs: started.append((args, kwargs)))
+
+    result_cache.store_result("real_tweet_scraper", "bob", 5, {"success": True, "tweets": [{"id": "1"}]})
+    result = result_cache.cached_scrape("real_tweet_scraper", fetch_fresh, "bob", 5, soft_ttl=0, hard_ttl=600,
+                                        deadline=2)
+    # The lease keeps a second stale hit from starting another refresh
+    result_cache.cached_scrape("real_tweet_scraper", fetch_fresh, "bob", 5, soft_ttl=0, hard_ttl=600)
+
+    assert result["cached"] is True
+    assert len(started) == 1
+    args, kwargs = started[0]
+    job = json.loads(args[-1])
+    assert job["module"] == "test_result_cache" and job["function"] == "fetch_fresh"
+    assert job["kwargs"] == {"deadline": result_cache.REFRESH_DEADLINE}
+    assert (job["soft_ttl"], job["hard_ttl"]) == (0, 600)
+    assert kwargs["start_new_session"] and kwargs["stdout"] == kwargs["stderr"] == subprocess.DEVNULL
+
+
+def test_refresh_process_stores_with_the_callers_ttls(cache_dir, monkeypatch):
+    monkeypatch.setenv('PYTHONPATH', os.path.dirname(os.path.abspath(__file__)))
+    result_cache.store_result("real_tweet_scraper", "bob", 5, {"success": True, "tweets": [{"id": "1"}]})
+    result_cache.cached_scrape("real_tweet_scraper", fetch_fresh, "bob", 5, soft_ttl=0, hard_ttl=600)
+
+    for _ in range(200):
+        entry = result_cache.load_entry("real_tweet_scraper", "bob", 5)
+        if entry["result"]["tweets"] == [{"id": "fresh"}]:
+            break
+        time.sleep(0.05)
+    assert entry["result"]["deadline"] == result_cache.REFRESH_DEADLINE
+    assert entry["soft_expires_at"] == entry["stored_at"]
+    assert entry["hard_expires_at"] == entry["stored_at"] + 600
+
+
+def full_tweet(i):
+    return {"id": str(i), "text": f"tweet {i}", "created_at": "", "date": "", "retweet_count": 1,
+            "like_count": 2, "reply_count": 0, "quote_count": 0, "url": f"https://twitter.com/bob/status/{i}"}
+
+
+def test_borrows_only_entries_with_the_full_tweet_schema():
+    route_tweets = [{"id": str(i), "text": "t", "created_at": "", "date": ""} for i in range(20)]
+    tweet_cache.store("tweets_route", "bob", {"max_tweets": 15}, {"success": True, "tweets": route_tweets}, 900, 3600)
+    assert result_cache.borrow_entry("bob", 5, 900) is None
+
+    tweet_cache.store("cached_tweets_route", "bob", {"max_tweets": 1},
+                      {"success": True, "tweets": [full_tweet(i) for i in range(6)]}, 900, 3600)
+    borrowed = result_cache.borrow_entry("bob", 5, 900)
+    assert borrowed["source"] == "cached_tweets_route"
+    assert [t["id"] for t in borrowed["result"]["tweets"]] == ["0", "1", "2", "3", "4"]
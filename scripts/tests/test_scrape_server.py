@@ -0,0 +1,69 @@
+import threading
+import time
+
+import scrape_profiler
+from scrape_server import ProfileGate
+
+
+def hold(gate, exclusive, entered, release, log, name):
+    def run():
+        with gate.enter(exclusive):
+            log.append(("in", name))
+            entered.set()
+            release.wait(5)
+            log.append(("out", name))
+    thread = threading.Thread(target=run)
+    thread.start()
+    return thread
+
+
+def test_profiled_request_waits_for_plain_requests_and_blocks_new_ones():
+    gate, log = ProfileGate(), []
+    plain_in, plain_release = threading.Event(), threading.Event()
+    plain = hold(gate, False, plain_in, plain_release, log, "plain")
+    plain_in.wait(5)
+
+    profiled_in, profiled_release = threading.Event(), threading.Event()
+    profiled = hold(gate, True, profiled_in, profiled_release, log, "profiled")
+    while not gate.waiting:
+        time.sleep(0.001)
+
+    # A plain request arriving now queues behind the waiting profiled one
+    late_in, late_release = threading.Event(), threading.Event()
+    late_release.set()
+    late = hold(gate, False, late_in, late_release, log, "late")
+    assert not profiled_in.wait(0.05) and not late_in.is_set()
+
+    plain_release.set()
+    profiled_in.wait(5)
+    assert not late_in.wait(0.05)
+    profiled_release.set()
+    for thread in (plain, profiled, late):
+        thread.join()
+    assert log == [("in", "plain"), ("out", "plain"), ("in", "profiled"), ("out", "profiled"),
+                   ("in", "late"), ("out", "late")]
+
+
+def test_profiled_requests_run_one_at_a_time():
+    gate, log = ProfileGate(), []
+    first_in, first_release = threading.Event(), threading.Event()
+    first = hold(gate, True, first_in, first_release, log, "first")
+    first_in.wait(5)
+
+    second_in, second_release = threading.Event(), threading.Event()
+    second_release.set()
+    second = hold(gate, True, second_in, second_release, log, "second")
+    assert not second_in.wait(0.05)
+    first_release.set()
+    first.join()
+    second.join()
+    assert log == [("in", "first"), ("out", "first"), ("in", "second"), ("out", "second")]
+
+
+def test_nested_profile_is_skipped(tmp_path):
+    path = str(tmp_path / "outer.json")
+    with scrape_profiler.profiled("outer", path) as outer:
+        with scrape_profiler.profiled("inner", str(tmp_path / "inner.json")) as inner:
+            pass
+    assert outer == path and inner is None
+    assert not (tmp_path / "inner.json").exists()
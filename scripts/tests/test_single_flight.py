@@ -0,0 +1,44 @@
+import threading
+import time
+
+from single_flight import SingleFlight
+
+
+def start_leader(flights, expires, release):
+    calls = []
+
+    def fetch(username, max_tweets):
+        calls.append(username)
+        release.wait(5)
+        return {"success": True, "tweets": [{"id": str(i)} for i in range(max_tweets)], "count": max_tweets}
+
+    thread = threading.Thread(target=flights.do, args=("real", "bob", 10, fetch, None, expires))
+    thread.start()
+    while not flights.flights:
+        time.sleep(0.001)
+    return thread, calls
+
+
+def test_request_without_deadline_does_not_join_a_bounded_flight():
+    flights, release = SingleFlight(), threading.Event()
+    thread, _ = start_leader(flights, time.monotonic() + 0.2, release)
+
+    own_calls = []
+    result = flights.do("real", "bob", 5, lambda u, n: own_calls.append(u) or {"success": True, "tweets": []})
+    release.set()
+    thread.join()
+
+    assert own_calls == ["bob"]
+    assert result["success"] is True
+
+
+def test_request_with_tighter_deadline_joins_and_is_trimmed():
+    flights, release = SingleFlight(), threading.Event()
+    thread, calls = start_leader(flights, None, release)
+    threading.Timer(0.05, release.set).start()
+
+    result = flights.do("real", "@Bob", 3, lambda u, n: {"success": False}, 5, time.monotonic() + 5)
+    thread.join()
+
+    assert calls == ["bob"]
+    assert result["count"] == 3 and len(result["tweets"]) == 3
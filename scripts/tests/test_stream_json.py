@@ -0,0 +1,88 @@
+import io
+import json
+import os
+import random
+
+import requests
+
+from real_tweet_scraper import SYNDICATION_PATH, SYNDICATION_FIELDS
+from stream_json import EACH, iter_items, iter_response_items
+
+FIXTURE = os.path.join(os.path.dirname(__file__), "fixtures", "syndication_timeline.json")
+
+
+def streamed_response(body):
+    response = requests.models.Response()
+    response.status_code = 200
+    response.raw = io.BytesIO(body)
+    return response
+
+def split(body, size):
+    return [body[i:i + size] for i in range(0, len(body), size)]
+
+
+def random_value(rng, depth=0):
+    kind = rng.randrange(8 if depth < 4 else 5)
+    if kind == 0:
+        return rng.choice([None, True, False])
+    if kind == 1:
+        return rng.randint(-10 ** 20, 10 ** 20)
+    if kind == 2:
+        return rng.uniform(-1e6, 1e6) * rng.choice([1, 1e-12, 1e12])
+    if kind in (3, 4):
+        alphabet = 'ab "\\/[]{}:,\n\té中\U0001f680'
+        return ''.join(rng.choice(alphabet) for _ in range(rng.randrange(12)))
+    if kind in (5, 6):
+        return {random_value(rng, 4) if rng.random() < 0.5 else f"k{i}": random_value(rng, depth + 1)
+                for i in range(rng.randrange(5))}
+    return [random_value(rng, depth + 1) for _ in range(rng.randrange(5))]
+
+def random_document(rng):
+    items = [random_value(rng, 1) for _ in range(rng.randrange(8))]
+    for _ in range(rng.randrange(4)):
+        items.append({"id": rng.randrange(10 ** 6), "text": random_value(rng, 4), "extra": random_value(rng, 1)})
+    rng.shuffle(items)
+    document = {"before": random_value(rng), "data": items, "after": random_value(rng)}
+    return json.dumps(document, ensure_ascii=rng.random() < 0.5, indent=rng.choice([None, 0, 2]))
+
+
+def test_matches_json_loads_on_random_documents_and_chunkings():
+    rng = random.Random(20261019)
+    for _ in range(400):
+        text = random_document(rng)
+        body = text.encode('utf-8')
+        expected = json.loads(text)["data"]
+        chunks = split(body, rng.choice([1, 2, 3, 7, 64, 4096]))
+
+        assert list(iter_items(chunks, ("data", EACH))) == expected
+        fields = {"id", "text"}
+        assert list(iter_items(split(body, rng.randrange(1, 50)), ("data", EACH), fields)) == [
+            {k: v for k, v in item.items() if k in fields} for item in expected if isinstance(item, dict)
+        ]
+
+
+def test_fixture_payload_streams_like_a_full_parse():
+    with open(FIXTURE, 'rb') as f:
+        body = f.read()
+    expected = [
+        {k: v for k, v in child["tweet"].items() if k in SYNDICATION_FIELDS}
+        for child in json.loads(body)["body"]["children"] if "tweet" in child
+    ]
+
+    for size in (1, 5, 64, 1 << 16):
+        items = iter_response_items(streamed_response(body), SYNDICATION_PATH, SYNDICATION_FIELDS, chunk_size=size)
+        assert list(items) == expected
+
+
+def test_stopping_early_leaves_the_rest_unread_and_closes_the_response():
+    with open(FIXTURE, 'rb') as f:
+        body = f.read()
+    response = streamed_response(body)
+
+    items = iter_response_items(response, SYNDICATION_PATH, SYNDICATION_FIELDS, chunk_size=256)
+    first = next(items)
+    assert response.raw.tell() < len(body)
+    items.close()
+
+    assert first["id_str"] == "1790000000000000003"
+    assert response.raw.closed
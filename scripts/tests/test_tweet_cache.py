@@ -0,0 +1,35 @@
+import os
+import time
+
+import pytest
+
+import tweet_cache
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(tweet_cache, 'CACHE_DIR', str(tmp_path / "tweet_cache"))
+    return tmp_path
+
+
+def test_eviction_interval_is_shared_through_the_marker_file(monkeypatch):
+    runs = []
+    monkeypatch.setattr(tweet_cache, 'evict', lambda *args: runs.append(1))
+
+    tweet_cache.maybe_evict()
+    tweet_cache.maybe_evict()
+    assert len(runs) == 1
+
+    # Another process evicted long ago: the marker's age is what counts
+    marker = os.path.join(tweet_cache.CACHE_DIR, tweet_cache.EVICT_MARKER)
+    old = time.time() - tweet_cache.EVICT_INTERVAL - 1
+    os.utime(marker, (old, old))
+    tweet_cache.maybe_evict()
+    assert len(runs) == 2
+
+
+def test_clear_keeps_the_marker_out_of_the_count():
+    tweet_cache.store("real_tweet_scraper", "bob", {"max_tweets": 5}, {"success": True, "tweets": []}, 60, 60)
+    tweet_cache.maybe_evict()
+
+    assert tweet_cache.clear() == 1
@@ -0,0 +1,40 @@
+import io
+import time
+
+import pytest
+
+import watch_accounts
+
+
+@pytest.fixture
+def state_path(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(watch_accounts, 'get_user_id', lambda username, token, pool: "42")
+    return str(tmp_path / "watch_state.json")
+
+
+def test_failed_poll_is_not_mistaken_for_dormancy(state_path, monkeypatch):
+    monkeypatch.setattr(watch_accounts, 'get_user_tweets', lambda *args, **kwargs: None)
+
+    state = watch_accounts.run_watch(["bob"], state_path, once=True, out=io.StringIO())
+
+    account = state["accounts"]["bob"]
+    assert account["last_polled"] == 0
+    assert account["tweets_per_hour"] is None
+    assert account["failures"] == 1
+    assert account["next_poll"] == account["retry_at"] > time.time()
+
+
+def test_empty_poll_counts_as_no_new_tweets(state_path, monkeypatch):
+    monkeypatch.setattr(watch_accounts, 'get_user_tweets', lambda *args, **kwargs: [])
+    state = watch_accounts.load_state(state_path)
+    state["accounts"]["bob"] = dict(watch_accounts.new_account(), user_id="42", since_id="7",
+                                    last_polled=time.time() - 3600, failures=2, retry_at=1)
+    watch_accounts.save_state(state, state_path)
+
+    state = watch_accounts.run_watch(["bob"], state_path, once=True, out=io.StringIO())
+
+    account = state["accounts"]["bob"]
+    assert account["last_polled"] > time.time() - 60
+    assert account["tweets_per_hour"] == 0
+    assert account["failures"] == 0
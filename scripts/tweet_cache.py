@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+"""
+Shared on-disk tweet cache
+One JSON file per (username, source, parameter set):
+    <TWEET_CACHE_DIR>/<username>/<source>.<param>-<value>[_...].json
+Each file carries its own TTL metadata, so the Next.js routes can read the
+same directory (app/api/twitter/shared-cache.ts) without re-scraping
+"""
+
+import json
+import os
+import re
+import sys
+import threading
+import time
+
+# Repo root by default, where Next.js (process.cwd()) looks too, whatever
+# directory the script is run from
+CACHE_DIR = os.getenv('TWEET_CACHE_DIR', os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'tweet_cache'))
+FORMAT_VERSION = 1
+MAX_BYTES = int(os.getenv('TWEET_CACHE_MAX_BYTES', 64 * 1024 * 1024))
+# Evict down to this fraction of MAX_BYTES so every write doesn't trigger a scan
+EVICT_TARGET = 0.9
+EVICT_INTERVAL = 60
+
+# Its mtime records the last eviction by any process sharing CACHE_DIR
+EVICT_MARKER = ".last_evict"
+
+_evict_lock = threading.Lock()
+
+
+def clean_username(username):
+    return username.replace('@', '').lower()
+
+def safe_name(value):
+    return re.sub(r'[^A-Za-z0-9_.-]+', '_', str(value))
+
+def params_name(params):
+    """
+    Stable file-name form of a parameter set, e.g. {"max_tweets": 50} -> max_tweets-50
+    """
+    return "_".join(f"{safe_name(k)}-{safe_name(v)}" for k, v in sorted(params.items())) or "default"
+
+def entry_path(source, username, params):
+    return os.path.join(CACHE_DIR, safe_name(clean_username(username)), f"{safe_name(source)}.{params_name(params)}.json")
+
+
+def load(source, username, params):
+    """
+    Entry for this key or None; a hit refreshes its position for LRU eviction
+    """
+    path = entry_path(source, username, params)
+    try:
+        if os.path.exists(path):
+            with open(path, 'r') as f:
+                entry = json.load(f)
+            if entry.get("format") == FORMAT_VERSION:
+                os.utime(path)
+                return entry
+    except Exception as e:
+        print(f"❌ Cache read error for {path}: {str(e)}", file=sys.stderr)
+    return None
+
+def save_entry(entry):
+    """
+    Write an entry atomically so readers (Python or Node) never see a partial file
+    """
+    path = entry_path(entry["source"], entry["username"], entry["params"])
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(entry, f, ensure_ascii=True)
+        os.replace(tmp_path, path)
+    except Exception as e:
+        print(f"❌ Cache write error for {path}: {str(e)}", file=sys.stderr)
+    maybe_evict()
+
+def store(source, username, params, result, soft_ttl, hard_ttl):
+    """
+    Cache a scrape result under its key with TTL metadata
+    """
+    now = time.time()
+    entry = {
+        "format": FORMAT_VERSION,
+        "source": source,
+        "username": clean_username(username),
+        "params": params,
+        "stored_at": now,
+        "soft_expires_at": now + soft_ttl,
+        "hard_expires_at": now + hard_ttl,
+        "result": result
+    }
+    save_entry(entry)
+    return entry
+
+def entries_for(username):
+    """
+    Every usable (format-compatible, not hard-expired) entry for a user
+    """
+    directory = os.path.join(CACHE_DIR, safe_name(clean_username(username)))
+    entries = []
+    now = time.time()
+    if not os.path.isdir(directory):
+        return entries
+    for name in os.listdir(directory):
+        if not name.endswith('.json'):
+            continue
+        try:
+            with open(os.path.join(directory, name), 'r') as f:
+                entry = json.load(f)
+            if entry.get("format") == FORMAT_VERSION and entry.get("hard_expires_at", 0) > now:
+                entries.append(entry)
+        except Exception:
+            # Partially written files never appear (writes are renames), so skip anything else odd
+            continue
+    return entries
+
+
+def _files():
+    for root, _, names in os.walk(CACHE_DIR):
+        for name in names:
+            path = os.path.join(root, name)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            yield path, name, st
+
+def evict(max_bytes=MAX_BYTES):
+    """
+    Drop hard-expired entries and stray temp files, then least recently used
+    entries until the cache is back under its size bound
+    """
+    now = time.time()
+    removed = 0
+    live = []
+    for path, name, st in _files():
+        expired = False
+        if name.endswith('.tmp'):
+            # Left behind by a crashed writer
+            expired = now - st.st_mtime > EVICT_INTERVAL
+        elif name.endswith('.json'):
+            try:
+                with open(path, 'r') as f:
+                    expired = json.load(f).get("hard_expires_at", 0) <= now
+            except Exception:
+                expired = True
+        if expired:
+            try:
+                os.remove(path)
+                removed += 1
+            except OSError:
+                pass
+        elif name.endswith('.json'):
+            live.append((st.st_mtime, st.st_size, path))
+
+    total = sum(size for _, size, _ in live)
+    if total > max_bytes:
+        for _, size, path in sorted(live):
+            if total <= max_bytes * EVICT_TARGET:
+                break
+            try:
+                os.remove(path)
+                total -= size
+                removed += 1
+            except OSError:
+                pass
+    if removed:
+        print(f"🧹 Evicted {removed} cache files ({total} bytes kept)", file=sys.stderr)
+    return removed
+
+def maybe_evict():
+    """
+    Run evict() at most once per EVICT_INTERVAL across every process
+    (CLI runs, workers, the server) writing to CACHE_DIR
+    """
+    marker = os.path.join(CACHE_DIR, EVICT_MARKER)
+    with _evict_lock:
+        try:
+            if time.time() - os.stat(marker).st_mtime < EVICT_INTERVAL:
+                return
+        except OSError:
+            pass
+        try:
+            os.makedirs(CACHE_DIR, exist_ok=True)
+            with open(marker, 'a'):
+                pass
+            os.utime(marker)
+        except OSError as e:
+            print(f"❌ Could not update {marker}: {str(e)}", file=sys.stderr)
+    try:
+        evict()
+    except Exception as e:
+        print(f"❌ Cache eviction error: {str(e)}", file=sys.stderr)
+
+def clear(username=None):
+    """
+    Remove one user's entries, or everything
+    """
+    removed = 0
+    prefix = os.path.join(CACHE_DIR, safe_name(clean_username(username))) if username else CACHE_DIR
+    for path, name, _ in list(_files()):
+        if path.startswith(prefix + os.sep) and name != EVICT_MARKER:
+            os.remove(path)
+            removed += 1
+    return removed
+
+def stats():
+    files = [(path, st.st_size) for path, name, st in _files() if name.endswith('.json')]
+    return {
+        "cache_dir": CACHE_DIR,
+        "entries": len(files),
+        "bytes": sum(size for _, size in files),
+        "max_bytes": MAX_BYTES,
+        "users": len({os.path.dirname(path) for path, _ in files})
+    }
+
+
+def main():
+    command = sys.argv[1] if len(sys.argv) > 1 else "stats"
+    if command == "evict":
+        evict()
+    elif command == "clear":
+        print(f"🗑️ Removed {clear(sys.argv[2] if len(sys.argv) > 2 else None)} cache files", file=sys.stderr)
+    elif command != "stats":
+        print(json.dumps({
+            "error": "Usage: python tweet_cache.py [stats | evict | clear [username]]",
+            "success": False
+        }))
+        sys.exit(1)
+    print(json.dumps(stats(), indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -16,7 +16,20 @@ import secrets
 import time
 import os
 
-def get_user_id(username, bearer_token):
+from cli_options import parse_args
+from credential_pool import CredentialPool, USER_LOOKUP_ENDPOINT, USER_TWEETS_ENDPOINT, endpoint_for
+from scrape_metrics import timed_request, record_parse, record_tweets, summary
+import response_archive
+from result_cache import swr_cached
+from scrape_profiler import stage, maybe_profiled
+from stream_json import EACH, iter_response_items
+
+# Fields kept from each item of the v2 timeline (items are decoded whole,
+# the rest of the payload is skipped undecoded)
+V2_TWEETS_PATH = ("data", EACH)
+V2_TWEET_FIELDS = {"id", "text", "created_at", "public_metrics"}
+
+def get_user_id(username, bearer_token, pool=None):
     """
     Get user ID from username using Twitter API v2
     """
@@ -27,7 +40,10 @@ def get_user_id(username, bearer_token):
             "User-Agent": "v2UserLookupPython"
         }
         
-        response = requests.get(url, headers=headers, timeout=10)
+        stage('fetch', 'user_lookup')
+        response = timed_request('twitter_api_v2', requests.get, url, headers=headers, timeout=10)
+        if pool:
+            pool.update(bearer_token, response, endpoint_for(url))
         
         if response.status_code == 200:
             data = response.json()
@@ -46,9 +62,11 @@ def get_user_id(username, bearer_token):
         print(f"❌ Error getting user ID: {str(e)}", file=sys.stderr)
         return None
 
-def get_user_tweets(user_id, bearer_token, max_tweets=50):
+def get_user_tweets(user_id, bearer_token, max_tweets=50, pool=None, since_id=None):
     """
     Get user's tweets using Twitter API v2
+    With since_id only tweets newer than that id are returned
+    Returns [] when there are no tweets and None when the request failed
     """
     try:
         url = f"https://api.twitter.com/2/users/{user_id}/tweets"
@@ -63,55 +81,75 @@ def get_user_tweets(user_id, bearer_token, max_tweets=50):
             "tweet.fields": "created_at,public_metrics,text",
             "exclude": "retweets,replies"  # Only original tweets
         }
+        if since_id:
+            params["since_id"] = since_id
         
-        response = requests.get(url, headers=headers, params=params, timeout=10)
+        stage('fetch', 'user_tweets')
+        response = timed_request('twitter_api_v2', requests.get, url, headers=headers, params=params, timeout=10,
+                                 stream=True)
+        if pool:
+            pool.update(bearer_token, response, endpoint_for(url))
         
         if response.status_code == 200:
-            data = response.json()
+            parse_start = time.perf_counter()
+            stage('parse', 'user_tweets')
+            items = []
             
-            if 'data' in data:
-                tweets = []
-                
-                for tweet_data in data['data']:
-                    tweet = {
-                        "id": tweet_data['id'],
-                        "text": tweet_data['text'],
-                        "created_at": tweet_data.get('created_at', datetime.now().isoformat()),
-                        "date": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                        "retweet_count": tweet_data.get('public_metrics', {}).get('retweet_count', 0),
-                        "like_count": tweet_data.get('public_metrics', {}).get('like_count', 0),
-                        "reply_count": tweet_data.get('public_metrics', {}).get('reply_count', 0),
-                        "quote_count": tweet_data.get('public_metrics', {}).get('quote_count', 0),
-                        "url": f"https://twitter.com/i/web/status/{tweet_data['id']}"
-                    }
-                    tweets.append(tweet)
-                
-                print(f"✅ Retrieved {len(tweets)} real tweets from Twitter API", file=sys.stderr)
-                return tweets
-            else:
+            for tweet_data in iter_response_items(response, V2_TWEETS_PATH, V2_TWEET_FIELDS):
+                items.append(tweet_data)
+                if len(items) >= max_tweets:
+                    break
+            
+            stage('normalize', 'user_tweets')
+            tweets = []
+            for tweet_data in items:
+                tweet = {
+                    "id": tweet_data['id'],
+                    "text": tweet_data['text'],
+                    "created_at": tweet_data.get('created_at', datetime.now().isoformat()),
+                    "date": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                    "retweet_count": tweet_data.get('public_metrics', {}).get('retweet_count', 0),
+                    "like_count": tweet_data.get('public_metrics', {}).get('like_count', 0),
+                    "reply_count": tweet_data.get('public_metrics', {}).get('reply_count', 0),
+                    "quote_count": tweet_data.get('public_metrics', {}).get('quote_count', 0),
+                    "url": f"https://twitter.com/i/web/status/{tweet_data['id']}"
+                }
+                tweets.append(tweet)
+            
+            if not tweets:
                 print("❌ No tweets found in API response", file=sys.stderr)
                 return []
+            
+            record_parse('twitter_api_v2', time.perf_counter() - parse_start)
+            record_tweets('twitter_api_v2', len(tweets))
+            print(f"✅ Retrieved {len(tweets)} real tweets from Twitter API", file=sys.stderr)
+            return tweets
         else:
             print(f"❌ Twitter API error: {response.status_code} - {response.text}", file=sys.stderr)
-            return []
+            return None
             
     except Exception as e:
         print(f"❌ Error getting tweets: {str(e)}", file=sys.stderr)
-        return []
+        return None
 
+@swr_cached('twitter_api_scraper')
 def scrape_user_tweets(username, max_tweets=50):
     """
     Main function to scrape tweets using Twitter API v2
     """
     try:
-        # Try to get Bearer Token from environment variable first, fallback to hardcoded
-        bearer_token = os.getenv('TWITTER_BEARER_TOKEN', "AAAAAAAAAAAAAAAAAAAAALNJfwEAAAAAm0aIfmDpV63anDHo%2FiJT%2FBnx0zs%3DApg1YFbpGF3ZiTnKVcNcaBx5M8KYDvdcXvNDHmRYKD5xgHkIRz")
+        # Each request goes to the configured token with the most headroom
+        pool = CredentialPool()
         
         username = username.replace('@', '').lower()
         print(f"🔍 Scraping {max_tweets} REAL tweets from @{username} using Twitter API...", file=sys.stderr)
         
+        bearer_token = pool.acquire(USER_LOOKUP_ENDPOINT)
+        if not bearer_token:
+            return rate_limited_result(username, pool, USER_LOOKUP_ENDPOINT)
+        
         # Step 1: Get user ID
-        user_id = get_user_id(username, bearer_token)
+        user_id = get_user_id(username, bearer_token, pool)
         if not user_id:
             return {
                 "success": False,
@@ -122,7 +160,10 @@ def scrape_user_tweets(username, max_tweets=50):
             }
         
         # Step 2: Get user's tweets
-        tweets = get_user_tweets(user_id, bearer_token, max_tweets)
+        bearer_token = pool.acquire(USER_TWEETS_ENDPOINT)
+        if not bearer_token:
+            return rate_limited_result(username, pool, USER_TWEETS_ENDPOINT)
+        tweets = get_user_tweets(user_id, bearer_token, max_tweets, pool)
         
         if tweets:
             # Show sample tweets for debugging
@@ -159,21 +200,44 @@ def scrape_user_tweets(username, max_tweets=50):
             "source": "twitter_api_v2"
         }
 
+def rate_limited_result(username, pool, endpoint=None):
+    """
+    Result returned when every credential is exhausted or revoked
+    """
+    wait_time = pool.wait_time(endpoint)
+    print(f"⏰ All credentials exhausted! Need to wait {int(wait_time)} seconds", file=sys.stderr)
+    return {
+        "success": False,
+        "error": f"Rate limited. Please wait {int(wait_time/60)} minutes before trying again.",
+        "tweets": [],
+        "username": username,
+        "source": "rate_limit_prevented"
+    }
+
 def main():
-    if len(sys.argv) < 2:
+    args, flags = parse_args(sys.argv[1:])
+    if len(args) < 1:
         print(json.dumps({
-            "error": "Usage: python twitter_api_scraper.py <username> [max_tweets]",
+            "error": "Usage: python twitter_api_scraper.py <username> [max_tweets] [--metrics] [--profile[=path]] [--no-cache] [--record=dir | --replay=dir [--replay-speed=x]]",
             "success": False
         }))
         sys.exit(1)
     
-    username = sys.argv[1]
-    max_tweets = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    username = args[0]
+    max_tweets = int(args[1]) if len(args) > 1 else 50
     
-    result = scrape_user_tweets(username, max_tweets)
+    # Recording and replaying must reach the backends, so they skip the cache
+    response_archive.configure_from_flags(flags)
+    use_cache = not (flags.get('no_cache') or flags.get('record') or flags.get('replay'))
     
-    # Output JSON with ASCII encoding to avoid Unicode errors
-    print(json.dumps(result, ensure_ascii=True, indent=2))
+    with maybe_profiled(flags.get('profile'), f"twitter_api_scraper_{username}", flags.get('profile')):
+        result = scrape_user_tweets(username, max_tweets, use_cache=use_cache)
+        if flags.get('metrics'):
+            result["metrics"] = summary()
+        stage('serialize')
+        # Output JSON with ASCII encoding to avoid Unicode errors
+        output = json.dumps(result, ensure_ascii=True, indent=2)
+    print(output, flush=True)
 
 if __name__ == "__main__":
     main()
@@ -8,43 +8,67 @@ import json
 import sys
 import requests
 from datetime import datetime
-import os
 import time
 
-# Import rate limiting
-try:
-    from rate_limit_tracker import can_make_request, record_request
-except ImportError:
-    def can_make_request():
-        return True, 0
-    def record_request():
-        pass
+from cli_options import parse_args
+from credential_pool import CredentialPool, USER_LOOKUP_ENDPOINT, endpoint_for
+from rate_limit_tracker import record_request
+from scrape_metrics import timed_request, record_parse, record_tweets, summary
+import response_archive
+from result_cache import swr_cached
+from scrape_profiler import stage, maybe_profiled
+from twitter_api_scraper import rate_limited_result
 
-def get_user_tweets(username, bearer_token, max_tweets):
+def api_get(url, bearer_token, pool=None, params=None):
+    """
+    GET with a bearer token; on 429 switch to another pooled token
+    Once the pool is exhausted the 429 is returned for the caller to report;
+    only a run without a pool waits out the window and retries
+    """
+    headers = {"Authorization": f"Bearer {bearer_token}"}
+    endpoint = endpoint_for(url)
+    stage('fetch', 'user_tweets' if url.endswith('/tweets') else 'user_lookup')
+    response = timed_request('twitter_api_bearer', requests.get, url, headers=headers, params=params, timeout=10)
+    if pool:
+        pool.update(bearer_token, response, endpoint)
+    elif not response_archive.replaying():
+        record_request()
+    
+    if response.status_code in (401, 403, 429) and pool:
+        next_token = pool.acquire(endpoint)
+        if next_token:
+            print("🔁 Retrying with another credential...", file=sys.stderr)
+            return api_get(url, next_token, pool, params)
+        return response
+    
+    if response.status_code == 429:
+        print("⏰ Rate limited! Twitter API allows 300 requests per 15 minutes.", file=sys.stderr)
+        print("⏰ Waiting 15 minutes (900 seconds) before retry...", file=sys.stderr)
+        response_archive.pause(900)
+        
+        # Retry once after waiting
+        response = timed_request('twitter_api_bearer', requests.get, url, headers=headers, params=params, timeout=10)
+        if not response_archive.replaying():
+            record_request()
+        print(f"Bearer token retry response: {response.status_code}", file=sys.stderr)
+    
+    return response
+
+def get_user_tweets(username, bearer_token, max_tweets, pool=None):
     """
     Get user tweets using Twitter API v2 with Bearer Token
+    Returns None when every pooled credential is rate limited
     """
     try:
         print(f"🔍 Getting tweets for @{username} using Twitter API v2...", file=sys.stderr)
         
         # Use Bearer Token for Twitter API v2
-        headers = {"Authorization": f"Bearer {bearer_token}"}
         url = f"https://api.twitter.com/2/users/by/username/{username}"
         
-        response = requests.get(url, headers=headers, timeout=10)
+        response = api_get(url, bearer_token, pool)
         print(f"Bearer token response: {response.status_code}", file=sys.stderr)
-        
-        # Record this API call
-        record_request()
-        
-        if response.status_code == 429:
-            print("⏰ Rate limited! Twitter API allows 300 requests per 15 minutes.", file=sys.stderr)
-            print("⏰ Waiting 15 minutes (900 seconds) before retry...", file=sys.stderr)
-            time.sleep(900)
-            
-            # Retry once after waiting
-            response = requests.get(url, headers=headers, timeout=10)
-            print(f"Bearer token retry response: {response.status_code}", file=sys.stderr)
+        if response.status_code == 429 and pool:
+            return None
         
         if response.status_code == 200:
             data = response.json()
@@ -60,21 +84,22 @@ def get_user_tweets(username, bearer_token, max_tweets):
                 }
                 
                 # Add small delay between API calls
-                time.sleep(1)
-                tweets_response = requests.get(tweets_url, headers=headers, params=params, timeout=10)
-                
-                # Record this API call too
-                record_request()
+                response_archive.pause(1)
                 
-                if tweets_response.status_code == 429:
-                    print("⏰ Rate limited on tweets endpoint! Waiting 15 minutes (900 seconds)...", file=sys.stderr)
-                    time.sleep(900)
-                    tweets_response = requests.get(tweets_url, headers=headers, params=params, timeout=10)
+                # Route the second call to whichever token now has the most headroom
+                if pool:
+                    bearer_token = pool.acquire(endpoint_for(tweets_url)) or bearer_token
+                tweets_response = api_get(tweets_url, bearer_token, pool, params)
+                if tweets_response.status_code == 429 and pool:
+                    return None
                 
                 if tweets_response.status_code == 200:
+                    parse_start = time.perf_counter()
+                    stage('parse', 'user_tweets')
                     tweets_data = tweets_response.json()
                     if 'data' in tweets_data:
                         tweets = []
+                        stage('normalize', 'user_tweets')
                         for tweet in tweets_data['data']:
                             tweets.append({
                                 "id": tweet['id'],
@@ -87,6 +112,8 @@ def get_user_tweets(username, bearer_token, max_tweets):
                                 "quote_count": tweet.get('public_metrics', {}).get('quote_count', 0),
                                 "url": f"https://twitter.com/i/web/status/{tweet['id']}"
                             })
+                        record_parse('twitter_api_bearer', time.perf_counter() - parse_start)
+                        record_tweets('twitter_api_bearer', len(tweets))
                         return tweets
         
         return []
@@ -96,14 +123,18 @@ def get_user_tweets(username, bearer_token, max_tweets):
         return []
 
 
+@swr_cached('twitter_api_simple')
 def scrape_user_tweets(username, max_tweets=15):
     """
     Scrape user tweets using Twitter API v2 Bearer Token
     """
     try:
-        # Check rate limits before making any requests
-        can_request, wait_time = can_make_request()
-        if not can_request:
+        # Pick the configured token with the most headroom; the per-token
+        # budgets replace the single shared one
+        pool = CredentialPool()
+        bearer_token = pool.acquire(USER_LOOKUP_ENDPOINT)
+        if not bearer_token:
+            wait_time = pool.wait_time(USER_LOOKUP_ENDPOINT)
             print(f"⏰ Rate limit reached! Need to wait {int(wait_time)} seconds", file=sys.stderr)
             return {
                 "success": False,
@@ -113,14 +144,14 @@ def scrape_user_tweets(username, max_tweets=15):
                 "source": "rate_limit_prevented"
             }
         
-        # Try to get Bearer Token from environment variable first, fallback to hardcoded
-        bearer_token = os.getenv('TWITTER_BEARER_TOKEN', "AAAAAAAAAAAAAAAAAAAAALNJfwEAAAAAm0aIfmDpV63anDHo%2FiJT%2FBnx0zs%3DApg1YFbpGF3ZiTnKVcNcaBx5M8KYDvdcXvNDHmRYKD5xgHkIRz")
         username = username.replace('@', '').lower()
         
         print(f"🔍 Scraping {max_tweets} REAL tweets from @{username} using Twitter API...", file=sys.stderr)
         
         # Get tweets using Bearer Token (rate limiting is handled inside)
-        tweets = get_user_tweets(username, bearer_token, max_tweets)
+        tweets = get_user_tweets(username, bearer_token, max_tweets, pool)
+        if tweets is None:
+            return rate_limited_result(username, pool)
         if tweets:
             return format_success(tweets, username, "bearer_token")
         
@@ -164,18 +195,28 @@ def format_success(tweets, username, method):
     }
 
 def main():
-    if len(sys.argv) < 2:
+    args, flags = parse_args(sys.argv[1:])
+    if len(args) < 1:
         print(json.dumps({
-            "error": "Usage: python twitter_api_simple.py <username> [max_tweets]",
+            "error": "Usage: python twitter_api_simple.py <username> [max_tweets] [--metrics] [--profile[=path]] [--no-cache] [--record=dir | --replay=dir [--replay-speed=x]]",
             "success": False
         }))
         sys.exit(1)
     
-    username = sys.argv[1]
-    max_tweets = int(sys.argv[2]) if len(sys.argv) > 2 else 15
+    username = args[0]
+    max_tweets = int(args[1]) if len(args) > 1 else 15
+    
+    # Recording and replaying must reach the backends, so they skip the cache
+    response_archive.configure_from_flags(flags)
+    use_cache = not (flags.get('no_cache') or flags.get('record') or flags.get('replay'))
     
-    result = scrape_user_tweets(username, max_tweets)
-    print(json.dumps(result, ensure_ascii=True, indent=2))
+    with maybe_profiled(flags.get('profile'), f"twitter_api_simple_{username}", flags.get('profile')):
+        result = scrape_user_tweets(username, max_tweets, use_cache=use_cache)
+        if flags.get('metrics'):
+            result["metrics"] = summary()
+        stage('serialize')
+        output = json.dumps(result, ensure_ascii=True, indent=2)
+    print(output, flush=True)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+"""
+Watch Accounts
+Keeps a set of accounts fresh by polling Twitter API v2 with since_id
+Each account's interval adapts to how often it posts and how much engagement
+it gets, and the whole schedule is scaled to fit the rate budget
+Only accounts with new tweets are emitted (JSON lines on stdout)
+"""
+
+import json
+import os
+import sys
+import time
+
+from cli_options import parse_args
+from credential_pool import CredentialPool, USER_LOOKUP_ENDPOINT, USER_TWEETS_ENDPOINT
+from engagement_analytics import parse_created_at
+from rate_limit_tracker import WINDOW_SECONDS, partition_limit
+from twitter_api_scraper import get_user_id, get_user_tweets
+
+STATE_FILE = "watch_state.json"
+MIN_INTERVAL = 2 * 60
+MAX_INTERVAL = 24 * 60 * 60
+DEFAULT_INTERVAL = 30 * 60
+# Aim for about this many new tweets per poll
+TWEETS_PER_POLL = 1.0
+# Smoothing for the posting-rate and engagement estimates
+ALPHA = 0.3
+# Leave headroom in the budget for interactive scrapes
+BUDGET_SHARE = 0.8
+MAX_TWEETS_PER_POLL = 100
+
+
+def load_state(path=STATE_FILE):
+    try:
+        if os.path.exists(path):
+            with open(path, 'r') as f:
+                return json.load(f)
+    except Exception as e:
+        print(f"❌ Could not read {path}: {str(e)}", file=sys.stderr)
+    return {"accounts": {}}
+
+def save_state(state, path=STATE_FILE):
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(state, f)
+    os.replace(tmp_path, path)
+
+def new_account():
+    return {
+        "user_id": None,
+        "since_id": None,
+        "last_polled": 0,
+        "next_poll": 0,
+        "interval": DEFAULT_INTERVAL,
+        "tweets_per_hour": None,
+        "engagement": None,
+        "failures": 0,
+        "retry_at": 0
+    }
+
+def engagement_of(tweet):
+    return (tweet.get('like_count', 0) + tweet.get('retweet_count', 0)
+            + tweet.get('reply_count', 0) + tweet.get('quote_count', 0))
+
+def smooth(previous, value):
+    return value if previous is None else ALPHA * value + (1 - ALPHA) * previous
+
+
+def update_estimates(account, tweets, now):
+    """
+    Fold a poll's results into the account's posting rate and engagement
+    """
+    if account["last_polled"] and account["since_id"]:
+        # Incremental poll: new tweets over the time since the last poll
+        hours = max((now - account["last_polled"]) / 3600.0, 1e-6)
+        rate = len(tweets) / hours
+    elif len(tweets) > 1:
+        # First poll: rate from the span of the recent timeline
+        times = sorted(t for t in (parse_created_at(tw.get('created_at')) for tw in tweets) if t == t)
+        hours = (times[-1] - times[0]) / 3600.0 if len(times) > 1 else 0
+        rate = (len(times) - 1) / hours if hours > 0 else None
+    else:
+        rate = None
+
+    if rate is not None:
+        account["tweets_per_hour"] = smooth(account["tweets_per_hour"], rate)
+    if tweets:
+        mean_engagement = sum(engagement_of(t) for t in tweets) / len(tweets)
+        account["engagement"] = smooth(account["engagement"], mean_engagement)
+
+def base_interval(account, median_engagement):
+    """
+    Interval that should catch about TWEETS_PER_POLL new tweets,
+    shortened for accounts with above-median engagement
+    """
+    rate = account["tweets_per_hour"]
+    if rate is None:
+        interval = DEFAULT_INTERVAL
+    elif rate <= 0:
+        interval = MAX_INTERVAL
+    else:
+        interval = TWEETS_PER_POLL / rate * 3600
+
+    if account["engagement"] and median_engagement:
+        # Up to 2x faster for hot accounts, up to 2x slower for quiet ones
+        boost = min(2.0, max(0.5, account["engagement"] / median_engagement))
+        interval /= boost
+    return min(MAX_INTERVAL, max(MIN_INTERVAL, interval))
+
+def budget_per_window(pool):
+    """
+    Requests per window the watcher may spend across all credentials
+    """
+    return max(1, int(len(pool.tokens) * partition_limit() * BUDGET_SHARE))
+
+def schedule(state, pool):
+    """
+    Recompute every interval, then stretch them all if the combined polling
+    rate would exceed the rate budget
+    """
+    accounts = state["accounts"]
+    engagements = sorted(a["engagement"] for a in accounts.values() if a["engagement"])
+    median_engagement = engagements[len(engagements) // 2] if engagements else None
+
+    intervals = {name: base_interval(a, median_engagement) for name, a in accounts.items()}
+    # Accounts still needing a user id lookup cost two requests per poll
+    demand = sum((1 if accounts[name]["user_id"] else 2) * WINDOW_SECONDS / interval
+                 for name, interval in intervals.items())
+    budget = budget_per_window(pool)
+    scale = max(1.0, demand / budget)
+    state["scale"] = scale
+    state["median_engagement"] = median_engagement
+    if scale > 1.0:
+        print(f"📉 Polling demand {demand:.0f}/window exceeds budget {budget}, slowing by {scale:.2f}x", file=sys.stderr)
+
+    for name, interval in intervals.items():
+        account = accounts[name]
+        account["interval"] = interval * scale
+        if account["last_polled"]:
+            account["next_poll"] = account["last_polled"] + account["interval"]
+        # A failed poll waits out its backoff rather than being retried at once
+        account["next_poll"] = max(account["next_poll"], account.get("retry_at", 0))
+
+
+class PollError(Exception):
+    """The user lookup or timeline request failed (not the same as no new tweets)"""
+
+
+def poll(username, account, pool, max_tweets=MAX_TWEETS_PER_POLL):
+    """
+    Fetch tweets newer than since_id; returns them (empty when unchanged),
+    or None when no credential is available
+    Raises PollError when the lookup or timeline request fails
+    """
+    if not account["user_id"]:
+        token = pool.acquire(USER_LOOKUP_ENDPOINT)
+        if not token:
+            return None
+        account["user_id"] = get_user_id(username, token, pool)
+        if not account["user_id"]:
+            raise PollError(f"Could not look up @{username}")
+
+    token = pool.acquire(USER_TWEETS_ENDPOINT)
+    if not token:
+        return None
+    tweets = get_user_tweets(account["user_id"], token, max_tweets, pool, since_id=account["since_id"])
+    if tweets is None:
+        raise PollError(f"Timeline request for @{username} failed")
+    return tweets
+
+def record_failure(account, now):
+    """
+    Back off exponentially from MIN_INTERVAL; the estimates and last_polled
+    are left alone so an outage is not mistaken for a quiet account
+    """
+    account["failures"] = account.get("failures", 0) + 1
+    account["retry_at"] = now + min(MAX_INTERVAL, MIN_INTERVAL * 2 ** (account["failures"] - 1))
+    account["next_poll"] = account["retry_at"]
+
+def emit(username, account, tweets, out):
+    out.write(json.dumps({
+        "username": username,
+        "tweets": tweets,
+        "count": len(tweets),
+        "since_id": account["since_id"],
+        "interval_seconds": round(account["interval"]),
+        "polled_at": account["last_polled"]
+    }, ensure_ascii=True) + "\n")
+    out.flush()
+
+def run_watch(usernames, state_path=STATE_FILE, once=False, out=sys.stdout):
+    """
+    Poll due accounts forever (or one round with once), emitting changes
+    """
+    state = load_state(state_path)
+    accounts = state["accounts"]
+    for username in usernames:
+        username = username.replace('@', '').lower()
+        accounts.setdefault(username, new_account())
+    for username in list(accounts):
+        if username not in {u.replace('@', '').lower() for u in usernames}:
+            del accounts[username]
+
+    pool = CredentialPool()
+    schedule(state, pool)
+    print(f"👀 Watching {len(accounts)} accounts", file=sys.stderr)
+
+    while True:
+        now = time.time()
+        wait_time = 0
+        due = sorted((a["next_poll"], name) for name, a in accounts.items() if a["next_poll"] <= now)
+        for _, username in due:
+            account = accounts[username]
+            try:
+                tweets = poll(username, account, pool)
+            except PollError as e:
+                record_failure(account, time.time())
+                print(f"❌ {str(e)}, retrying in {int(account['retry_at'] - time.time())} seconds", file=sys.stderr)
+                continue
+            if tweets is None:
+                wait_time = pool.wait_time()
+                print(f"⏰ No credential available, waiting {int(wait_time)} seconds", file=sys.stderr)
+                break
+
+            polled_at = time.time()
+            update_estimates(account, tweets, polled_at)
+            account["last_polled"] = polled_at
+            account["failures"], account["retry_at"] = 0, 0
+            # Reschedule this account now; the full budget split is redone once per round
+            account["interval"] = base_interval(account, state.get("median_engagement")) * state.get("scale", 1.0)
+            account["next_poll"] = polled_at + account["interval"]
+            if tweets:
+                account["since_id"] = max((t["id"] for t in tweets), key=int)
+                emit(username, account, tweets, out)
+
+        if due:
+            schedule(state, pool)
+            save_state(state, state_path)
+
+        if once:
+            return state
+
+        upcoming = min((a["next_poll"] for a in accounts.values()), default=now + DEFAULT_INTERVAL)
+        time.sleep(min(max(upcoming - time.time(), wait_time, 1), MIN_INTERVAL))
+
+
+def main():
+    args, flags = parse_args(sys.argv[1:])
+    if len(args) < 1:
+        print(json.dumps({
+            "error": "Usage: python watch_accounts.py <usernames_file> [--state=path] [--once]",
+            "success": False
+        }))
+        sys.exit(1)
+
+    with open(args[0]) as f:
+        usernames = [line.strip() for line in f if line.strip()]
+    run_watch(usernames, flags.get('state', STATE_FILE), bool(flags.get('once')))
+
+if __name__ == "__main__":
+    main()